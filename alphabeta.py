@@ -1,7 +1,73 @@
 # alphabeta.py
 import math
+import time
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
 
-def alphabeta(board, depth, alpha, beta, maximizing, player, eval_fn):
+# Fewer children than this are cheaper to score one by one than in a batch
+BATCH_MIN_CHILDREN = 8
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search once its cancel event is set"""
+
+
+class SearchTimeout(SearchCancelled):
+    """Raised inside a search once its deadline has passed"""
+
+
+class SearchStats:
+    """Counters collected during a search.
+
+    cancel may be set to a threading.Event; the search checks it at every
+    node and raises SearchCancelled once it is set. deadline is a
+    time.perf_counter() value checked every 256 nodes (SearchTimeout).
+    root_moves maps each root move to its nodes and elapsed milliseconds,
+    summed over iterative-deepening passes.
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.max_depth = 0   # Deepest ply reached below the root
+        self.root_moves = {}
+        self.cancel = None
+        self.deadline = None
+
+    def record_root_move(self, move, nodes, elapsed):
+        entry = self.root_moves.setdefault(move, {"nodes": 0, "ms": 0.0})
+        entry["nodes"] += nodes
+        entry["ms"] += elapsed * 1000
+
+    def merge(self, other):
+        """Add the counters of another search (e.g. from a worker process)"""
+        self.nodes += other["nodes"]
+        self.leaf_evals += other["leaf_evals"]
+        self.cutoffs += other["cutoffs"]
+        self.max_depth = max(self.max_depth, other["max_depth"])
+
+    def as_dict(self):
+        return {"nodes": self.nodes, "leaf_evals": self.leaf_evals, "cutoffs": self.cutoffs,
+                "max_depth": self.max_depth,
+                "root_moves": {str(m): dict(e, ms=round(e["ms"], 3))
+                               for m, e in sorted(self.root_moves.items())}}
+
+
+def alphabeta(board, depth, alpha, beta, maximizing, player, eval_fn, tt=None,
+              order=None, stats=None, ply=0, batch_eval=None):
+    # The board is mutated during the search and restored before returning,
+    # also when SearchCancelled/SearchTimeout unwinds through it.
+    # With batch_eval(rows, player, board) -> values, nodes one ply above the
+    # horizon score all their children in a single call instead of one
+    # eval_fn call per leaf.
+    if stats is not None:
+        stats.nodes += 1
+        if ply > stats.max_depth:
+            stats.max_depth = ply
+        if stats.cancel is not None and stats.cancel.is_set():
+            raise SearchCancelled
+        if stats.deadline is not None and not stats.nodes & 255 \
+                and time.perf_counter() > stats.deadline:
+            raise SearchTimeout
     opponent = 'O' if player == 'X' else 'X'
     winner = board.winner()
 
@@ -12,28 +78,209 @@ def alphabeta(board, depth, alpha, beta, maximizing, player, eval_fn):
         return -1000 - depth  # Prefer slower losses
     if winner == 'D':
         return 0
-    
+
     # If depth limit reached, use evaluation function
     if depth == 0:
+        if stats is not None:
+            stats.leaf_evals += 1
         return eval_fn(board, player)
 
-    if maximizing:
+    # Transposition table probe (key covers all 8 board symmetries unless
+    # the table is for an asymmetric evaluator)
+    if tt is not None:
+        key = (board.key() if tt.symmetric else board.raw_key(), depth, maximizing, player)
+        entry = tt.get(key)
+        if entry is not None:
+            flag, cached = entry
+            if flag == EXACT:
+                return cached
+            if flag == LOWER:
+                alpha = max(alpha, cached)
+            else:
+                beta = min(beta, cached)
+            if beta <= alpha:
+                return cached
+        alpha0, beta0 = alpha, beta
+
+    moves = board.legal_moves()
+    if depth == 1 and batch_eval is not None and len(moves) >= BATCH_MIN_CHILDREN:
+        value = _batch_children(board, moves, player if maximizing else opponent,
+                                maximizing, player, batch_eval, stats)
+        moves = ()  # Children already scored
+    elif order is not None:
+        moves = order.order(board, moves, ply, player if maximizing else opponent)
+
+    # Children are searched in place: make the move, recurse, undo it
+    if not moves:
+        pass
+    elif maximizing:
         value = -math.inf
-        for move in board.legal_moves():
-            b = board.copy()
-            b.make_move(move, player)
-            value = max(value, alphabeta(b, depth-1, alpha, beta, False, player, eval_fn))
+        for move in moves:
+            board.make_move(move, player)
+            try:
+                value = max(value, alphabeta(board, depth-1, alpha, beta, False, player,
+                                             eval_fn, tt, order, stats, ply+1, batch_eval))
+            finally:
+                board.undo_move(move)
             alpha = max(alpha, value)
             if beta <= alpha:
+                if order is not None:
+                    order.record_cutoff(move, ply, depth)
+                if stats is not None:
+                    stats.cutoffs += 1
                 break
-        return value
     else:
         value = math.inf
-        for move in board.legal_moves():
-            b = board.copy()
-            b.make_move(move, opponent)
-            value = min(value, alphabeta(b, depth-1, alpha, beta, True, player, eval_fn))
+        for move in moves:
+            board.make_move(move, opponent)
+            try:
+                value = min(value, alphabeta(board, depth-1, alpha, beta, True, player,
+                                             eval_fn, tt, order, stats, ply+1, batch_eval))
+            finally:
+                board.undo_move(move)
             beta = min(beta, value)
             if beta <= alpha:
+                if order is not None:
+                    order.record_cutoff(move, ply, depth)
+                if stats is not None:
+                    stats.cutoffs += 1
                 break
-        return value
+
+    if tt is not None:
+        if value <= alpha0:
+            tt.store(key, UPPER, value)
+        elif value >= beta0:
+            tt.store(key, LOWER, value)
+        else:
+            tt.store(key, EXACT, value)
+    return value
+
+
+def _batch_children(board, moves, mover, maximizing, player, batch_eval, stats):
+    # Score every child at the horizon: terminals directly, the rest in one batch
+    opponent = 'O' if player == 'X' else 'X'
+    values, rows = [], []
+    for move in moves:
+        board.make_move(move, mover)
+        winner = board.winner()
+        if winner is None:
+            rows.append(list(board.cells))
+        else:
+            values.append(1000 if winner == player else -1000 if winner == opponent else 0)
+        board.undo_move(move)
+    if rows:
+        values.extend(batch_eval(rows, player, board))
+    if stats is not None:
+        stats.nodes += len(moves)
+        stats.leaf_evals += len(rows)
+    return max(values) if maximizing else min(values)
+
+
+def search_root(board, player, depth, eval_fn, moves=None, tt=None, order=None, stats=None,
+                batch_eval=None, visit=None, report=None):
+    """Score each root move in one pass, as [(move, score, exact)].
+
+    Alpha is threaded across siblings: each move after the first is searched
+    with alpha just below the best score so far, so moves that cannot reach
+    it are cut off and their score is only an upper bound (exact=False).
+    Moves that tie or beat the best still get exact scores, so the best
+    moves are the same as with a full-window search of every move.
+    visit(move, board) is called with each child position before it is
+    searched, e.g. to record its static evaluation in the same loop, and
+    report(move, score, exact) as soon as each move has been scored.
+    """
+    moves = board.legal_moves() if moves is None else moves
+    scores = []
+    best = -math.inf
+    for m in moves:
+        nodes, start = (stats.nodes, time.perf_counter()) if stats is not None else (0, 0)
+        # Just below the best so far: moves that tie it are still scored exactly
+        alpha = math.nextafter(best, -math.inf) if best > -math.inf else -9999
+        if visit is not None:
+            board.make_move(m, player)
+            visit(m, board)
+            board.undo_move(m)
+        if depth == 0 and batch_eval is not None:
+            s = _batch_children(board, (m,), player, True, player, batch_eval, stats)
+        else:
+            board.make_move(m, player)
+            try:
+                s = alphabeta(board, depth, alpha, 9999, False, player, eval_fn, tt, order,
+                              stats, 1, batch_eval)
+            finally:
+                board.undo_move(m)
+        if stats is not None:
+            stats.record_root_move(m, stats.nodes - nodes, time.perf_counter() - start)
+        scores.append((m, s, s > alpha))
+        best = max(best, s)
+        if report is not None:
+            report(m, s, s > alpha)
+    return scores
+
+
+def rescore_exact(board, player, depth, eval_fn, scores, tt=None, order=None, stats=None,
+                  batch_eval=None):
+    """search_root's scores with every upper bound re-searched with a full window.
+
+    For callers that rank moves other than the best, e.g. to pick a
+    near-miss, where bounds would put cut-off moves above their real value.
+    """
+    result = []
+    for m, s, exact in scores:
+        if not exact:
+            board.make_move(m, player)
+            try:
+                s = alphabeta(board, depth, -9999, 9999, False, player, eval_fn, tt, order,
+                              stats, 1, batch_eval)
+            finally:
+                board.undo_move(m)
+        result.append((m, s, True))
+    return result
+
+
+def iterative_deepening(board, player, eval_fn, budget_ms, max_depth=None, tt=None,
+                        order=None, stats=None, batch_eval=None, visit=None, report=None):
+    """Search depth 0, 1, 2, ... until the time budget runs out.
+
+    Depths are in alphabeta's units (plies below each root move). Returns
+    (scores, depth) from the deepest iteration that finished, with scores
+    as search_root's [(move, score, exact)]; depth 0 always completes so
+    there is a move to play. Each iteration searches root moves best-first
+    by the previous iteration's scores, and the transposition table and
+    killer/history tables carry over (pass tt for an eval_fn that is not
+    symmetric; the default table is). visit is passed to the first pass;
+    report(move, score, exact) is called for each root move of every pass, so later
+    calls for a move supersede earlier ones.
+    """
+    if max_depth is None:
+        max_depth = len(board.legal_moves()) - 1  # Enough to reach the end
+    if tt is None:
+        tt = TranspositionTable()
+    if stats is None:
+        stats = SearchStats()
+    deadline = time.perf_counter() + budget_ms / 1000
+    moves = list(board.legal_moves())
+    scores, completed = None, None
+
+    for depth in range(max_depth + 1):
+        stats.deadline = deadline if scores is not None else None
+        try:
+            result = search_root(board, player, depth, eval_fn, moves, tt, order, stats,
+                                 batch_eval, visit if scores is None else None, report)
+        except SearchTimeout:
+            break
+        finally:
+            stats.deadline = None
+        scores, completed = result, depth
+        # Principal variation first on the next pass: exact scores best-first,
+        # then the cut-off moves in their previous order (their bounds do not
+        # rank them)
+        moves = ([m for m, _, _ in sorted((r for r in result if r[2]),
+                                          key=lambda x: x[1], reverse=True)]
+                 + [m for m, _, exact in result if not exact])
+        # Stop once the best move is a proven win or every move is a proven loss
+        best = max(s for _, s, _ in result)
+        if best >= 1000 or all(s <= -1000 for _, s, _ in result) \
+                or time.perf_counter() >= deadline:
+            break
+    return scores, completed
@@ -0,0 +1,133 @@
+# arena.py
+# Headless AI-vs-AI / AI-vs-random games for strength and speed regression.
+#
+#   python arena.py --games 2000 --a Hard --b random
+#   python arena.py --games 500 --a Normal:ML --b Easy:Classical --workers 4
+#   python arena.py --games 200 --a Normal --b random --n 4 --k 3
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from board import Board
+from engine import Engine, DIFFICULTY, EVAL_MODES, ML_MODES
+
+_models = {}  # Trained models by kind, shared with worker processes
+
+
+def _init_worker(models):
+    global _models
+    _models = models
+
+
+def parse_player(spec):
+    """'random' or 'Difficulty[:EvalMode]', e.g. 'Hard' or 'Normal:MLP'"""
+    if spec == "random":
+        return spec
+    difficulty, _, eval_mode = spec.partition(":")
+    eval_mode = eval_mode or "Classical"
+    if difficulty not in DIFFICULTY or eval_mode not in EVAL_MODES:
+        raise argparse.ArgumentTypeError(f"invalid player: {spec}")
+    return difficulty, eval_mode
+
+
+def play_game(job):
+    """Play one game; returns (winner from A's view, A latencies, B latencies)"""
+    seed, spec_a, spec_b, a_is_x, n, k = job
+    random.seed(seed)
+    # Already inside a pool worker, so engines search serially
+    players = {}
+    for name, spec in (("A", spec_a), ("B", spec_b)):
+        if spec == "random":
+            players[name] = spec
+        else:
+            model = _models.get(ML_MODES.get(spec[1]))
+            players[name] = Engine(*spec, model=model, k=k)
+    marks = {"X": "A" if a_is_x else "B", "O": "B" if a_is_x else "A"}
+    latencies = {"A": [], "B": []}
+
+    board = Board(n=n, k=k)
+    turn = "X"
+    while board.winner() is None:
+        name = marks[turn]
+        player = players[name]
+        start = time.perf_counter()
+        if player == "random":
+            move = random.choice(board.legal_moves())
+        else:
+            move, _ = player.choose_move(list(board.cells), turn)
+        latencies[name].append(time.perf_counter() - start)
+        board.make_move(move, turn)
+        turn = "O" if turn == "X" else "X"
+
+    w = board.winner()
+    result = "draw" if w == "D" else ("win" if marks[w] == "A" else "loss")
+    return result, latencies["A"], latencies["B"]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def describe(spec):
+    return spec if spec == "random" else f"{spec[0]}/{spec[1]}"
+
+
+def run(games, spec_a, spec_b, workers=None, seed=0, models=None, n=3, k=3):
+    jobs = [(seed + i, spec_a, spec_b, i % 2 == 0, n, k) for i in range(games)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(models or {},)) as pool:
+        results = list(pool.map(play_game, jobs, chunksize=max(1, games // 64)))
+    elapsed = time.perf_counter() - start
+
+    counts = {"win": 0, "draw": 0, "loss": 0}
+    lat = {"A": [], "B": []}
+    for result, lat_a, lat_b in results:
+        counts[result] += 1
+        lat["A"].extend(lat_a)
+        lat["B"].extend(lat_b)
+    total_moves = len(lat["A"]) + len(lat["B"])
+
+    print(f"A = {describe(spec_a)}  vs  B = {describe(spec_b)}  ({games} games on {n}x{n}, "
+          f"{k} in a row, A plays X in half)")
+    print(f"  A win {counts['win'] / games:6.1%}   draw {counts['draw'] / games:6.1%}   "
+          f"loss {counts['loss'] / games:6.1%}")
+    print(f"  {total_moves} moves in {elapsed:.2f}s = {total_moves / elapsed:,.0f} moves/s")
+    for name, spec in (("A", spec_a), ("B", spec_b)):
+        if spec == "random":
+            continue
+        ms = [t * 1000 for t in lat[name]]
+        print(f"  {name} latency ms  p50 {percentile(ms, 50):.3f}  p90 {percentile(ms, 90):.3f}  "
+              f"p99 {percentile(ms, 99):.3f}  max {max(ms, default=0):.3f}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Tic-Tac-Toe AI arena")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--a", type=parse_player, default=parse_player("Hard"),
+                        help="player A: 'random' or Difficulty[:" + "|".join(EVAL_MODES) + "]")
+    parser.add_argument("--b", type=parse_player, default="random",
+                        help="player B, same format as --a")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n", type=int, default=3, help="board size")
+    parser.add_argument("--k", type=int, default=None, help="marks in a row to win (default min(n, 5))")
+    args = parser.parse_args()
+    k = args.k if args.k is not None else min(args.n, 5)
+
+    models = {}
+    for spec in (args.a, args.b):
+        if spec != "random" and spec[1] in ML_MODES:
+            from trainer import load_or_train
+            kind = ML_MODES[spec[1]]
+            models[kind] = load_or_train(silent=True, kind=kind)
+    run(args.games, args.a, args.b, args.workers, args.seed, models, args.n, k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# benchmark.py
+# Benchmark suite for search, evaluation, training and startup.
+#
+#   python benchmark.py                               # run and print the suite
+#   python benchmark.py --json out.json               # also write JSON results
+#   python benchmark.py --save-baseline bench_baseline.json
+#   python benchmark.py --baseline bench_baseline.json --threshold 0.25 \
+#                       --threshold-for train_lstsq=1.0
+#   python benchmark.py --allocations --ordering      # extra reports
+#
+# Also measures allocations made by one search with tracemalloc (the
+# original copy-per-child alphabeta versus the in-place make/unmake search)
+# and the nodes visited under each move ordering.
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from board import Board, BitBoard
+from alphabeta import alphabeta, search_root, SearchStats
+from heuristic import classical_eval
+from ordering import ORDERINGS, MoveOrderer
+from ml_model import LinearModel, OneHotModel, MLPModel, extract_features
+from transposition import TranspositionTable
+from evaltable import classical_table
+from parallel import parallel_root_search
+
+
+def copying_alphabeta(board, depth, alpha, beta, maximizing, player, eval_fn):
+    # Reference copy of the original search, which copies the board per child
+    opponent = 'O' if player == 'X' else 'X'
+    winner = board.winner()
+    if winner == player:
+        return 1000 + depth
+    if winner == opponent:
+        return -1000 - depth
+    if winner == 'D':
+        return 0
+    if depth == 0:
+        return eval_fn(board, player)
+
+    if maximizing:
+        value = -math.inf
+        for move in board.legal_moves():
+            b = board.copy()
+            b.make_move(move, player)
+            value = max(value, copying_alphabeta(b, depth-1, alpha, beta, False, player, eval_fn))
+            alpha = max(alpha, value)
+            if beta <= alpha:
+                break
+        return value
+    else:
+        value = math.inf
+        for move in board.legal_moves():
+            b = board.copy()
+            b.make_move(move, opponent)
+            value = min(value, copying_alphabeta(b, depth-1, alpha, beta, True, player, eval_fn))
+            beta = min(beta, value)
+            if beta <= alpha:
+                break
+        return value
+
+
+def measure(search, board_cls, depth):
+    """Run one root search from the empty board.
+
+    Returns (boards allocated, peak traced bytes).
+    Boards are counted through a subclass because freed objects no longer
+    show up in tracemalloc snapshots.
+    """
+    created = [0]
+
+    class CountingBoard(board_cls):
+        __slots__ = ()
+        def __init__(self, *args):
+            created[0] += 1
+            super().__init__(*args)
+        def copy(self):
+            return CountingBoard(self.cells.copy() if board_cls is Board else self.cells)
+
+    board = CountingBoard()
+    created[0] = 0
+    tracemalloc.start()
+    for m in board.legal_moves():
+        board.make_move(m, 'X')
+        search(board, depth, -9999, 9999, False, 'X', classical_eval)
+        board.undo_move(m)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return created[0], peak
+
+
+# Mid-game positions (X to move) used for node counts
+POSITIONS = ["X---O----", "O---X----", "-X--O----", "X-O-O-X--", "----X---O"]
+
+
+def count_nodes(make_order, depth):
+    stats = SearchStats()
+    for cells in POSITIONS:
+        board = BitBoard(list(cells))
+        order = make_order() if make_order else None
+        for m in board.legal_moves():
+            board.make_move(m, 'X')
+            alphabeta(board, depth, -9999, 9999, False, 'X', classical_eval,
+                      order=order, stats=stats)
+            board.undo_move(m)
+    return stats.nodes
+
+
+def allocation_report():
+    depth = 9
+    print(f"Root search from the empty board, depth {depth}\n")
+    print(f"{'search':<22}{'board':<10}{'boards allocated':>18}{'peak bytes':>12}")
+    # BitBoard memoizes its counters per position on first read; fill the
+    # memo untraced so it is not counted against either search
+    measure(alphabeta, BitBoard, depth)
+    for name, search in (("copy per child", copying_alphabeta), ("make/unmake", alphabeta)):
+        for board_cls in (Board, BitBoard):
+            boards, peak = measure(search, board_cls, depth)
+            print(f"{name:<22}{board_cls.__name__:<10}{boards:>18}{peak:>12}")
+
+
+def ordering_report():
+    print(f"Nodes visited by move ordering ({len(POSITIONS)} positions)\n")
+    print(f"{'ordering':<18}" + "".join(f"{'depth ' + str(d):>12}" for d in (1, 3, 9)))
+    for name, make_order in ORDERINGS.items():
+        counts = [count_nodes(make_order, d) for d in (1, 3, 9)]
+        print(f"{name:<18}" + "".join(f"{c:>12}" for c in counts))
+
+
+# ---------- Suite ----------
+# Fixed weights so evaluation timings do not depend on training
+BENCH_MODEL = LinearModel()
+BENCH_MODEL.weights = [-0.04, 0.06, 0.13, -0.48, 0.02, 0.14]
+BENCH_MODEL.bias = 0.28
+
+_rng = random.Random(0)
+BENCH_ONEHOT = OneHotModel()
+BENCH_ONEHOT.weights = [_rng.uniform(-1, 1) for _ in range(27)]
+BENCH_MLP = MLPModel([[_rng.uniform(-0.3, 0.3) for _ in range(32)] for _ in range(27)],
+                     [0.0] * 32, [_rng.uniform(-0.3, 0.3) for _ in range(32)], 0.0)
+
+def _random_boards(count, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = BitBoard()
+        turn = 'X'
+        for _ in range(rng.randint(0, 7)):
+            if board.winner() is not None:
+                break
+            board.make_move(rng.choice(board.legal_moves()), turn)
+            turn = 'O' if turn == 'X' else 'X'
+        boards.append(board)
+    return boards
+
+EVAL_BOARDS = _random_boards(2000)
+
+
+def bench_search(depth):
+    def run():
+        stats = SearchStats()
+        for cells in POSITIONS:
+            board = BitBoard(list(cells))
+            search_root(board, 'X', depth, classical_eval, tt=TranspositionTable(),
+                        order=MoveOrderer(), stats=stats)
+        return stats.nodes
+    return run
+
+
+# 5x5, four in a row: deep enough for the process pool to pay for itself
+LARGE_POSITION = ("------------X-----------O", 5, 4)
+
+
+def bench_large_root(parallel):
+    """Root search of LARGE_POSITION, serial (alpha threaded, shared table) or in the pool"""
+    cells, n, k = LARGE_POSITION
+    def run():
+        stats = SearchStats()
+        if parallel:
+            parallel_root_search(list(cells), 'X', 4, classical_eval, stats=stats, n=n, k=k)
+        else:
+            search_root(Board(list(cells), n, k), 'X', 4, classical_eval,
+                        tt=TranspositionTable(), order=MoveOrderer(), stats=stats)
+        return stats.nodes
+    return run
+
+
+def bench_eval(fn):
+    def run():
+        for board in EVAL_BOARDS:
+            fn(board, 'X')
+            fn(board, 'O')
+        return 2 * len(EVAL_BOARDS)
+    return run
+
+
+def bench_features():
+    for board in EVAL_BOARDS:
+        extract_features(board)
+    return len(EVAL_BOARDS)
+
+
+def bench_train(method):
+    def run():
+        from trainer import train
+        train(silent=True, method=method)
+        return 0
+    return run
+
+
+def bench_startup():
+    # Fresh interpreter importing the app; falls back to the headless engine
+    # when the GUI toolkit is not installed
+    code = ("import time; t = time.perf_counter()\n"
+            "try:\n    import main\nexcept ImportError:\n    import engine, trainer\n"
+            "import trainer; trainer.load_cached_model()\n")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=SCRIPT_DIR,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return 0
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (callable returning a work count, repeats)
+BENCHMARKS = {
+    "alphabeta_d1": (bench_search(1), 5),
+    "alphabeta_d3": (bench_search(3), 5),
+    "alphabeta_d9": (bench_search(9), 3),
+    "root_5x5_serial": (bench_large_root(False), 3),
+    "root_5x5_parallel": (bench_large_root(True), 3),
+    "classical_eval": (bench_eval(classical_eval), 5),
+    "ml_eval": (bench_eval(BENCH_MODEL.evaluate), 5),
+    "onehot_eval": (bench_eval(BENCH_ONEHOT.evaluate), 5),
+    "mlp_eval": (bench_eval(BENCH_MLP.evaluate), 3),
+    "table_eval": (bench_eval(classical_table().evaluate), 5),
+    "extract_features": (bench_features, 5),
+    "train_sgd_fast": (bench_train("sgd-fast"), 3),
+    "train_lstsq": (bench_train("lstsq"), 3),
+    "startup": (bench_startup, 3),
+}
+
+
+def run_benchmark(fn, repeats):
+    """Best-of-N wall time, then one extra run under tracemalloc for peak memory"""
+    best = math.inf
+    nodes = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        nodes = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_s": round(best, 6),
+        "nodes": nodes,
+        "nodes_per_s": round(nodes / best) if nodes and best > 0 else 0,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(names=None):
+    results = {}
+    for name, (fn, repeats) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        try:
+            results[name] = run_benchmark(fn, repeats)
+        except (ImportError, subprocess.CalledProcessError) as e:
+            results[name] = {"skipped": str(e) or type(e).__name__}
+    return results
+
+
+def print_results(results):
+    print(f"{'benchmark':<18}{'wall ms':>10}{'nodes':>10}{'nodes/s':>12}{'peak KB':>10}")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<18}  skipped: {r['skipped']}")
+            continue
+        print(f"{name:<18}{r['wall_s'] * 1000:>10.2f}{r['nodes']:>10}"
+              f"{r['nodes_per_s']:>12,}{r['peak_kb']:>10.1f}")
+
+
+def compare(results, baseline, threshold, overrides):
+    """Regressions against a baseline: slower wall time or more nodes searched.
+
+    A metric regresses when current > baseline * (1 + threshold), with
+    per-benchmark thresholds taken from overrides.
+    """
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base or "skipped" in r or "skipped" in base:
+            continue
+        limit = 1 + overrides.get(name, threshold)
+        for metric in ("wall_s", "nodes"):
+            if base[metric] and r[metric] > base[metric] * limit:
+                regressions.append(f"{name}.{metric}: {r[metric]} > {base[metric]} "
+                                   f"(+{r[metric] / base[metric] - 1:.0%}, limit +{limit - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search/eval/startup benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown as a fraction (default 0.2 = 20%%)")
+    parser.add_argument("--threshold-for", action="append", default=[], metavar="NAME=FRAC",
+                        help="per-benchmark threshold override")
+    parser.add_argument("--allocations", action="store_true", help="print the allocation report")
+    parser.add_argument("--ordering", action="store_true", help="print nodes per move ordering")
+    args = parser.parse_args()
+
+    if args.allocations or args.ordering:
+        if args.allocations:
+            allocation_report()
+            print()
+        if args.ordering:
+            ordering_report()
+        return
+
+    results = run_suite(args.names)
+    print_results(results)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        overrides = {}
+        for item in args.threshold_for:
+            name, _, frac = item.partition("=")
+            overrides[name] = float(frac)
+        regressions = compare(results, baseline, args.threshold, overrides)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,441 @@
 # board.py
+from functools import lru_cache
+from math import isqrt
 
-WIN_LINES = [
-    (0,1,2),(3,4,5),(6,7,8),
-    (0,3,6),(1,4,7),(2,5,8),
-    (0,4,8),(2,4,6)
+# ---------- Geometry ----------
+@lru_cache(maxsize=None)
+def win_lines(n=3, k=3):
+    """Every run of k cells in a row, column or diagonal of an n x n board"""
+    lines = []
+    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]  # rows, columns, diagonals
+    for dr, dc in directions:
+        for r in range(n):
+            for c in range(n):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < n and 0 <= end_c < n:
+                    lines.append(tuple((r + dr * j) * n + c + dc * j for j in range(k)))
+    return tuple(lines)
+
+@lru_cache(maxsize=None)
+def lines_through(n=3, k=3):
+    """For each cell, the win lines that contain it"""
+    through = [[] for _ in range(n * n)]
+    for line in win_lines(n, k):
+        for i in line:
+            through[i].append(line)
+    return tuple(tuple(t) for t in through)
+
+@lru_cache(maxsize=None)
+def line_ids_through(n=3, k=3):
+    """For each cell, the indices (into win_lines) of the lines that contain it"""
+    through = [[] for _ in range(n * n)]
+    for j, line in enumerate(win_lines(n, k)):
+        for i in line:
+            through[i].append(j)
+    return tuple(tuple(t) for t in through)
+
+@lru_cache(maxsize=None)
+def center_cells(n=3):
+    # One center cell on odd boards, the middle 2x2 block on even ones
+    mids = [n // 2] if n % 2 else [n // 2 - 1, n // 2]
+    return tuple(r * n + c for r in mids for c in mids)
+
+@lru_cache(maxsize=None)
+def corner_cells(n=3):
+    return (0, n - 1, n * (n - 1), n * n - 1)
+
+WIN_LINES = win_lines(3, 3)
+
+# ---------- Symmetry ----------
+@lru_cache(maxsize=None)
+def symmetries(n=3):
+    # Each entry maps cell index -> index of the same cell after the transform
+    transforms = [
+        lambda r, c: (r, c),                  # identity
+        lambda r, c: (c, n - 1 - r),          # rotate 90
+        lambda r, c: (n - 1 - r, n - 1 - c),  # rotate 180
+        lambda r, c: (n - 1 - c, r),          # rotate 270
+        lambda r, c: (r, n - 1 - c),          # mirror left-right
+        lambda r, c: (n - 1 - r, c),          # mirror top-bottom
+        lambda r, c: (c, r),                  # main diagonal
+        lambda r, c: (n - 1 - c, n - 1 - r),  # anti diagonal
+    ]
+    syms = []
+    for t in transforms:
+        perm = []
+        for i in range(n * n):
+            r, c = t(i // n, i % n)
+            perm.append(r * n + c)
+        syms.append(tuple(perm))
+    return tuple(syms)
+
+SYMMETRIES = symmetries(3)
+
+# SYM_MASKS[s][m] is 3x3 occupancy mask m after applying symmetry s
+SYM_MASKS = [
+    [sum(1 << perm[i] for i in range(9) if m >> i & 1) for m in range(1 << 9)]
+    for perm in SYMMETRIES
 ]
 
-class Board:
-    def __init__(self, cells=None):
-        self.cells = cells if cells else ['-'] * 9
+def _permute_mask(mask, perm):
+    out = 0
+    while mask:
+        low = mask & -mask
+        out |= 1 << perm[low.bit_length() - 1]
+        mask ^= low
+    return out
+
+def canonical_key(x, o, n=3):
+    """Symmetry-reduced key from X and O occupancy masks"""
+    if n == 3:
+        return min((t[x] << 9) | t[o] for t in SYM_MASKS)
+    size = n * n
+    return min((_permute_mask(x, p) << size) | _permute_mask(o, p) for p in symmetries(n))
+
+
+# ---------- Incremental line counts ----------
+# Counters are packed into one int, FIELD_BITS per counter: X's five
+# counters in the low fields, O's from O_SHIFT up
+FIELD_BITS = 12
+FIELD_MASK = (1 << FIELD_BITS) - 1
+NEAR, OPEN, COUNT, CENTER, CORNER = range(5)
+O_SHIFT = 5 * FIELD_BITS
+SHIFT = {'X': 0, 'O': O_SHIFT}
+
+# Powers of 3 for the base-3 code, by cell (boards up to 16 x 16)
+POW3 = [3 ** i for i in range(16 * 16)]
+
+
+@lru_cache(maxsize=None)
+def count_tables(n=3, k=3):
+    """Per-player lookups for LineCounts: {player: (inc, trans, cell, digit)}.
+
+    A line's state is a + b * (k + 1) for a X marks and b O marks.
+    trans[s] is the change in the packed near/open counters when the
+    player adds a mark to a line in state s (state s + inc afterwards),
+    cell[i] the packed count/center/corner change for a mark on cell i and
+    digit[i] its change to the base-3 code.
+    """
+    stride = k + 1
+    near = k - 1
+
+    def classify(a, b, shift):
+        # Packed near/open contribution of a line with a own and b other marks
+        if b or a == 0:
+            return 0
+        if a == near:
+            return 1 << (shift + NEAR * FIELD_BITS)
+        if a < near:
+            return 1 << (shift + OPEN * FIELD_BITS)
+        return 0
+
+    value = [0] * (stride * stride)
+    for a in range(stride):
+        for b in range(stride):
+            value[a + stride * b] = classify(a, b, 0) + classify(b, a, O_SHIFT)
+    centers, corners = set(center_cells(n)), set(corner_cells(n))
+    tables = {}
+    for player, inc, d in (('X', 1, 1), ('O', stride, 2)):
+        shift = SHIFT[player]
+        trans = [value[s + inc] - value[s] if s + inc < len(value) else 0
+                 for s in range(len(value))]
+        cell = [(1 << (shift + COUNT * FIELD_BITS))
+                + ((1 << (shift + CENTER * FIELD_BITS)) if i in centers else 0)
+                + ((1 << (shift + CORNER * FIELD_BITS)) if i in corners else 0)
+                for i in range(n * n)]
+        digit = [d * POW3[i] for i in range(n * n)]
+        tables[player] = (inc, trans, cell, digit)
+    return tables
+
+
+class _PlayerCounts:
+    # Read-only {'X': n, 'O': n} view of one packed counter
+    __slots__ = ("board", "field")
+
+    def __init__(self, board, field):
+        self.board = board
+        self.field = field
+
+    def __getitem__(self, player):
+        return self.board.packed >> (SHIFT[player] + self.field * FIELD_BITS) & FIELD_MASK
+
+
+class LineCounts:
+    """Evaluation counters kept up to date by make_move/undo_move.
+
+    line_state[j]   a + b * (k + 1) for a X and b O marks in win line j
+    packed          every counter below, FIELD_BITS each (see counts())
+    near[p]         lines with k-1 marks of p and none of the opponent
+    open[p]         lines with 1..k-2 marks of p and none of the opponent
+    count/center/corner[p]  marks of p overall, on center and on corner cells
+    code            base-3 position code, sum of digit * 3**cell with
+                    '-'=0, 'X'=1, 'O'=2 (the solved/eval table index on 3x3)
+
+    A move only touches the lines through its cell, and each of those is
+    one lookup in the precomputed count_tables. BitBoard computes packed
+    and code from its masks instead (see _BIT_PACKED).
+    """
+    __slots__ = ()
+
+    def _init_counts(self, cells):
+        self.line_state = [0] * len(self.lines)
+        self.packed = 0
+        self.code = 0
+        for i, c in enumerate(cells):
+            if c != '-':
+                self._add(i, c)
+
+    def _add(self, idx, player):
+        inc, trans, cell, digit = self.tables[player]
+        state = self.line_state
+        packed = self.packed + cell[idx]
+        for j in self.line_ids_through[idx]:
+            s = state[j]
+            packed += trans[s]
+            state[j] = s + inc
+        self.packed = packed
+        self.code += digit[idx]
+
+    def _remove(self, idx, player):
+        inc, trans, cell, digit = self.tables[player]
+        state = self.line_state
+        packed = self.packed - cell[idx]
+        for j in self.line_ids_through[idx]:
+            s = state[j] - inc
+            packed -= trans[s]
+            state[j] = s
+        self.packed = packed
+        self.code -= digit[idx]
+
+    def counts(self, player):
+        """(near, open, count, center, corner) for player"""
+        v = self.packed >> SHIFT[player]
+        return (v & FIELD_MASK, v >> FIELD_BITS & FIELD_MASK, v >> 2 * FIELD_BITS & FIELD_MASK,
+                v >> 3 * FIELD_BITS & FIELD_MASK, v >> 4 * FIELD_BITS & FIELD_MASK)
+
+    @property
+    def near(self):
+        return _PlayerCounts(self, NEAR)
+
+    @property
+    def open(self):
+        return _PlayerCounts(self, OPEN)
+
+    @property
+    def count(self):
+        return _PlayerCounts(self, COUNT)
+
+    @property
+    def center(self):
+        return _PlayerCounts(self, CENTER)
+
+    @property
+    def corner(self):
+        return _PlayerCounts(self, CORNER)
+
+
+class Board(LineCounts):
+    """n x n board where k in a row wins (classic 3 x 3 by default)"""
+
+    def __init__(self, cells=None, n=None, k=None):
+        if n is None:
+            n = isqrt(len(cells)) if cells else 3
+        self.n = n
+        self.k = k if k is not None else min(n, 5)
+        self.size = n * n
+        self.cells = cells if cells else ['-'] * self.size
+        self.lines = win_lines(n, self.k)
+        self.lines_through = lines_through(n, self.k)
+        self.line_ids_through = line_ids_through(n, self.k)
+        self.centers = center_cells(n)
+        self.corners = corner_cells(n)
+        self.tables = count_tables(n, self.k)
+        # Winner is tracked incrementally; make_move saves the previous value
+        self.empty = self.cells.count('-')
+        self._winner = self._scan_winner()
+        self._winner_stack = []
+        self._init_counts(self.cells)
 
     def copy(self):
-        return Board(self.cells.copy())
+        return Board(self.cells.copy(), self.n, self.k)
 
     def legal_moves(self):
-        return [i for i in range(9) if self.cells[i] == '-']
+        return [i for i, c in enumerate(self.cells) if c == '-']
 
     def make_move(self, idx, player):
         self.cells[idx] = player
+        self.empty -= 1
+        self._add(idx, player)
+        self._winner_stack.append(self._winner)
+        if self._winner is None:
+            # Only lines through the new mark can have been completed
+            cells = self.cells
+            for line in self.lines_through[idx]:
+                if all(cells[i] == player for i in line):
+                    self._winner = player
+                    break
+
+    def undo_move(self, idx):
+        self._remove(idx, self.cells[idx])
+        self.cells[idx] = '-'
+        self.empty += 1
+        if self._winner_stack:
+            self._winner = self._winner_stack.pop()
+        else:
+            self._winner = self._scan_winner()
+
+    def is_terminal(self):
+        return self.winner() is not None
+
+    def key(self):
+        x = o = 0
+        for i, c in enumerate(self.cells):
+            if c == 'X':
+                x |= 1 << i
+            elif c == 'O':
+                o |= 1 << i
+        return canonical_key(x, o, self.n)
+
+    def raw_key(self):
+        """Exact position key without the symmetry reduction (cheap)"""
+        return (self.k, tuple(self.cells))
+
+    def winner(self):
+        if self._winner is not None:
+            return self._winner
+        if self.empty == 0:
+            return 'D'
+        return None
+
+    def _scan_winner(self):
+        cells = self.cells
+        for line in self.lines:
+            first = cells[line[0]]
+            if first != '-' and all(cells[i] == first for i in line):
+                return first
+        return None
+
+
+# ---------- Bitboard ----------
+# Bit i of a mask is set when cell i is occupied
+FULL_MASK = (1 << 9) - 1
+WIN_MASKS = [(1 << a) | (1 << b) | (1 << c) for a, b, c in WIN_LINES]
+
+# Precomputed per-mask lookups so winner() and legal_moves() are O(1)
+HAS_WIN = [any(m & w == w for w in WIN_MASKS) for m in range(FULL_MASK + 1)]
+FREE_CELLS = [tuple(i for i in range(9) if m >> i & 1) for m in range(FULL_MASK + 1)]
+
+
+# BitBoard's make/undo only flip mask bits. Its base-3 code (all a table
+# lookup needs) is two lookups in MASK_CODE, and the line counters are
+# computed when first read, once per position (memoized by code), so
+# searches that never read them pay nothing for them.
+_BIT_PACKED = {}
+
+# MASK_CODE[m] is the base-3 code of X marks on the cells of mask m (O marks
+# count double)
+MASK_CODE = [sum(POW3[i] for i in range(9) if m >> i & 1) for m in range(1 << 9)]
+
+
+def _bit_packed(x, o):
+    # Packed counters of a 3x3 position, accumulated as Board does on construction
+    tables = count_tables(3, 3)
+    ids = line_ids_through(3, 3)
+    state = [0] * len(WIN_LINES)
+    packed = 0
+    for player, mask in (('X', x), ('O', o)):
+        inc, trans, cell, _ = tables[player]
+        for idx in range(9):
+            if mask >> idx & 1:
+                packed += cell[idx]
+                for j in ids[idx]:
+                    packed += trans[state[j]]
+                    state[j] += inc
+    return packed
+
+
+class BitBoard(LineCounts):
+    """Drop-in replacement for a 3x3 Board backed by two 9-bit integers"""
+    __slots__ = ("x", "o")
+
+    # Geometry shared with Board so evaluators work on either
+    n = 3
+    k = 3
+    size = 9
+    lines = WIN_LINES
+    lines_through = lines_through(3, 3)
+    line_ids_through = line_ids_through(3, 3)
+    centers = center_cells(3)
+    corners = corner_cells(3)
+
+    def __init__(self, cells=None):
+        self.x = 0
+        self.o = 0
+        if cells:
+            for i, c in enumerate(cells):
+                if c != '-':
+                    self.make_move(i, c)
+
+    @property
+    def cells(self):
+        """List view for code that reads cells (evaluators, UI)"""
+        x, o = self.x, self.o
+        return ['X' if x >> i & 1 else 'O' if o >> i & 1 else '-' for i in range(9)]
+
+    @property
+    def code(self):
+        return MASK_CODE[self.x] + 2 * MASK_CODE[self.o]
+
+    @property
+    def packed(self):
+        packed = _BIT_PACKED.get(self.code)
+        if packed is None:
+            packed = _BIT_PACKED[self.code] = _bit_packed(self.x, self.o)
+        return packed
+
+    def copy(self):
+        b = BitBoard.__new__(BitBoard)
+        b.x = self.x
+        b.o = self.o
+        return b
+
+    def legal_moves(self):
+        # Returns a shared tuple - do not mutate
+        return FREE_CELLS[~(self.x | self.o) & FULL_MASK]
+
+    def make_move(self, idx, player):
+        if player == 'X':
+            self.x |= 1 << idx
+        else:
+            self.o |= 1 << idx
+
+    def undo_move(self, idx):
+        bit = ~(1 << idx)
+        self.x &= bit
+        self.o &= bit
 
     def is_terminal(self):
-        return self.winner() is not None or '-' not in self.cells
+        return self.winner() is not None
+
+    def key(self):
+        return canonical_key(self.x, self.o)
+
+    def raw_key(self):
+        """Exact position key without the symmetry reduction (cheap)"""
+        return (self.x << 9) | self.o
 
     def winner(self):
-        for a,b,c in WIN_LINES:
-            if self.cells[a] == self.cells[b] == self.cells[c] != '-':
-                return self.cells[a]
-        if '-' not in self.cells:
+        if HAS_WIN[self.x]:
+            return 'X'
+        if HAS_WIN[self.o]:
+            return 'O'
+        if self.x | self.o == FULL_MASK:
             return 'D'
         return None
+
+
+def make_board(cells=None, n=3, k=3):
+    """Fastest board implementation for an n x n, k-in-a-row variant"""
+    if n == 3 and k == 3:
+        return BitBoard(cells)
+    return Board(list(cells) if cells else None, n, k)
@@ -0,0 +1,64 @@
+# conftest.py
+# Helpers shared by the test modules.
+import random
+
+from alphabeta import alphabeta
+from board import Board
+from heuristic import classical_eval
+from ml_model import MODELS, MLPModel
+
+OTHER = {'X': 'O', 'O': 'X'}
+
+
+def random_positions(n, k, count, seed=0):
+    """(cells, player to move) of non-terminal positions from random games"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board(n=n, k=k)
+        player = 'X'
+        for _ in range(rng.randrange(n * n)):
+            if board.winner() is not None:
+                break
+            board.make_move(rng.choice(board.legal_moves()), player)
+            player = OTHER[player]
+        if board.winner() is None:
+            positions.append((board.cells.copy(), player))
+    return positions
+
+
+def full_window(board, player, depth, eval_fn=classical_eval, tt=None):
+    """Exact score of every root move, each with its own full-window search"""
+    scores = {}
+    for m in board.legal_moves():
+        board.make_move(m, player)
+        scores[m] = alphabeta(board, depth, -9999, 9999, False, player, eval_fn, tt)
+        board.undo_move(m)
+    return scores
+
+
+def assert_same_best(scores, exact):
+    """Root scores [(move, score, exact)] agree with full_window where it matters:
+    same best moves and score, exact scores exact, the others upper bounds"""
+    best = max(exact.values())
+    assert max(s for _, s, _ in scores) == best
+    assert {m for m, s, _ in scores if s == best} == {m for m, s in exact.items() if s == best}
+    for m, s, is_exact in scores:
+        if is_exact:
+            assert s == exact[m]
+        else:
+            assert exact[m] <= s < best
+
+
+def random_model(kind, seed=0):
+    """Model of MODELS[kind] with random parameters"""
+    rng = random.Random(seed)
+    cls = MODELS[kind]
+    if cls is MLPModel:
+        return MLPModel([[rng.uniform(-1, 1) for _ in range(8)] for _ in range(27)],
+                        [rng.uniform(-1, 1) for _ in range(8)],
+                        [rng.uniform(-1, 1) for _ in range(8)], rng.uniform(-1, 1))
+    model = cls()
+    model.weights = [rng.uniform(-1, 1) for _ in range(cls.n_features)]
+    model.bias = rng.uniform(-1, 1)
+    return model
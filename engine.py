@@ -0,0 +1,332 @@
+# engine.py
+# Headless AI: difficulty settings, evaluation modes and move selection.
+# Shared by the GUI (main.py) and the arena CLI; nothing here touches Tk.
+import json
+import random
+import time
+from math import isqrt
+from board import make_board
+from alphabeta import iterative_deepening, rescore_exact, SearchStats, SearchCancelled
+from transposition import TranspositionTable
+from ordering import MoveOrderer
+from solver import get_solved_table
+from heuristic import classical_eval
+from mcts import MCTS
+from evalcache import EVAL_CACHE
+from evaltable import classical_table, model_table
+
+# ---------- Difficulty ----------
+# depth caps the search; budget_ms is the per-move time for iterative deepening
+# and MCTS; playouts caps the MCTS iterations
+DIFFICULTY = {
+    "Easy":   {"depth": 1, "budget_ms": 50,   "mistake": 0.50, "noise": 5.0, "playouts": 100},    # Very shallow, lots of mistakes
+    "Normal": {"depth": 3, "budget_ms": 200,  "mistake": 0.20, "noise": 1.5, "playouts": 1000},   # Moderate depth, some mistakes
+    "Hard":   {"depth": 9, "budget_ms": 1000, "mistake": 0.0,  "noise": 0.0, "playouts": 20000}   # Perfect play
+}
+
+# "MCTS" swaps alpha-beta for Monte Carlo tree search with random playouts
+EVAL_MODES = ("Classical", "ML", "One-hot", "MLP", "MCTS")
+
+# Wall-clock cap on pondering per human turn: the ponder thread shares the
+# GIL with the Tk loop, so it must not run for as long as the human thinks
+PONDER_MS = 3000
+
+# Evaluation modes backed by a trained model, and the model kind each expects
+# (see ml_model.MODELS)
+ML_MODES = {"ML": "linear", "One-hot": "onehot", "MLP": "mlp"}
+
+def noisy_eval(board, player, eval_fn, noise):
+    base = eval_fn(board, player)
+    return base + random.uniform(-noise, noise) if noise > 0 else base
+
+
+class Engine:
+    """AI player for one difficulty and evaluation mode.
+
+    model is the trained model for the ML modes, of the kind ML_MODES names;
+    without it, or on a board size its inputs do not fit, they fall back to
+    the classical heuristic. Positions are n x n cell lists of any n, with
+    k in a row to win (default as for Board). The solved table, opening
+    book and eval tables only exist for 3x3. With trace_path, every move
+    appends one JSON line of search statistics.
+    """
+
+    def __init__(self, difficulty="Normal", eval_mode="Classical", model=None, trace_path=None,
+                 k=None):
+        self.difficulty = difficulty
+        self.eval_mode = eval_mode
+        self.model = model
+        self.trace_path = trace_path
+        self.k = k
+        self.use_ml = eval_mode in ML_MODES and model is not None
+        # On 3x3, leaves are one index into a memory-mapped table of
+        # precomputed values for every configuration (None if it cannot be
+        # written)
+        self.table = None
+        if k in (None, 3):
+            self.table = model_table(model) if self.use_ml else classical_table()
+        # Elsewhere, model evaluations are memoized for the session, one at a
+        # time or a batch of horizon children at a time
+        self.model_eval = self.model_batch = None
+        if self.use_ml:
+            name = "ML " + model.fingerprint()
+            self.model_eval = EVAL_CACHE.wrap(model.evaluate, name)
+            self.model_batch = EVAL_CACHE.wrap_batch(model.evaluate_batch, name)
+        # Kept for the engine's lifetime and reused between turns and by ponder()
+        self.mcts = MCTS() if eval_mode == "MCTS" else None
+        # Symmetric positions may only share entries if the evaluator scores
+        # them the same
+        self.tt = TranspositionTable(symmetric=model.symmetric if self.use_ml else True)
+
+    def variant(self, cells):
+        """(n, k) of the board these cells are on"""
+        n = isqrt(len(cells))
+        return n, self.k if self.k is not None else min(n, 5)
+
+    def is_classic(self, cells):
+        # The solved table, opening book and eval tables are for 3x3 only
+        return self.variant(cells) == (3, 3)
+
+    def uses_table(self, cells):
+        return self.table is not None and self.is_classic(cells)
+
+    def uses_model(self, cells):
+        # One-hot inputs are laid out for a single board size
+        return self.use_ml and self.model.board_size in (None, len(cells))
+
+    def base_eval(self, cells):
+        """Noise-free evaluator for positions of this size"""
+        if self.uses_table(cells):
+            return self.table.evaluate
+        # classical_eval only reads line counters and needs no cache
+        return self.model_eval if self.uses_model(cells) else classical_eval
+
+    def choose_move(self, cells, ai, report=None, stats=None):
+        """Pick the AI move for a position and build the analysis log.
+
+        Safe to run off the Tk thread: it only works on its own copies of the
+        board. report(cell, score, exact) is called as each root move is scored, and
+        stats.cancel (a threading.Event) aborts the search with SearchCancelled.
+        """
+        if stats is None:
+            stats = SearchStats()
+        start = time.perf_counter()
+        best, log = self._choose_move(cells, ai, report, stats)
+        if self.trace_path:
+            self.write_trace(cells, ai, best, time.perf_counter() - start, stats)
+        return best, log
+
+    def eval_fns(self, cells):
+        """(eval_fn, batch_eval) for the search, with the difficulty's noise"""
+        noise = DIFFICULTY[self.difficulty]["noise"]
+        # Noise goes on top of the (possibly cached) base value
+        base_eval = self.base_eval(cells)
+        def eval_fn(b, p): return noisy_eval(b, p, base_eval, noise)
+        
+        # Without a table, the model can score all children of a horizon node
+        # in one NumPy call
+        batch_eval = None
+        if self.uses_model(cells) and not self.uses_table(cells):
+            model_batch = self.model_batch
+            def batch_eval(rows, p, geometry):
+                values = model_batch(rows, p, geometry)
+                return [v + random.uniform(-noise, noise) for v in values] if noise > 0 else values
+        return eval_fn, batch_eval
+
+    def ponder(self, cells, human, cancel):
+        """Search ahead on the human's time until cancel (a threading.Event) is set.
+
+        MCTS grows its tree from the human-to-move position, so the subtree
+        of the reply actually played becomes the next root. Alpha-beta
+        searches the AI's answer to each likely reply, best replies first,
+        into the engine's transposition table, which choose_move shares;
+        with evaluation noise the table only lives for one turn, so there is
+        nothing to ponder. Returns once everything worth pondering is done, after PONDER_MS
+        or on cancel.
+        """
+        cfg = DIFFICULTY[self.difficulty]
+        deadline = time.perf_counter() + PONDER_MS / 1000
+        n, k = self.variant(cells)
+        board = make_board(list(cells), n, k)
+        if board.winner() is not None:
+            return
+        ai = 'O' if human == 'X' else 'X'
+        stats = SearchStats()
+        stats.cancel = cancel
+        try:
+            if self.mcts is not None:
+                # Enough visits for each reply's subtree to cover a full turn's playouts
+                limit = cfg["playouts"] * len(board.legal_moves())
+                while self.mcts.root is None or self.mcts.root_cells != list(cells) \
+                        or self.mcts.root.visits < limit:
+                    remaining_ms = (deadline - time.perf_counter()) * 1000
+                    if remaining_ms <= 0:
+                        break
+                    self.mcts.search(cells, human, 256, remaining_ms, stats, k)
+                return
+            if self.difficulty == "Hard" and self.is_classic(cells):
+                return  # Answered from the solved table, nothing to search
+            if cfg["noise"] > 0:
+                return  # choose_move starts from an empty table
+            eval_fn, batch_eval = self.eval_fns(cells)
+            replies = []
+            for m in board.legal_moves():
+                board.make_move(m, human)
+                replies.append((classical_eval(board, human), m))
+                board.undo_move(m)
+            for _, m in sorted(replies, reverse=True):
+                if time.perf_counter() >= deadline:
+                    break
+                board.make_move(m, human)
+                try:
+                    if board.winner() is None:
+                        iterative_deepening(board, ai, eval_fn, cfg["budget_ms"], cfg["depth"],
+                                            self.tt, MoveOrderer(), stats, batch_eval)
+                finally:
+                    board.undo_move(m)
+        except SearchCancelled:
+            pass
+
+    def write_trace(self, cells, ai, best, elapsed, stats):
+        record = {"time": time.time(), "difficulty": self.difficulty,
+                  "eval": self.eval_mode, "board": "".join(cells), "player": ai,
+                  "move": best, "ms": round(elapsed * 1000, 3)}
+        record.update(stats.as_dict())
+        try:
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+
+    def _choose_move(self, cells, ai, report, stats):
+        difficulty, eval_mode = self.difficulty, self.eval_mode
+        cfg = DIFFICULTY[difficulty]
+        depth, mistake = cfg["depth"], cfg["mistake"]
+        
+        base_eval = self.base_eval(cells)
+        eval_fn, batch_eval = self.eval_fns(cells)
+        
+        n, k = self.variant(cells)
+        if n * n != len(cells):
+            raise ValueError(f"{len(cells)} cells is not a square board")
+        classic = self.is_classic(cells)
+        # Fast board for the deep search (a BitBoard on 3x3)
+        root = make_board(list(cells), n, k)
+        moves = list(root.legal_moves())
+        
+        # Hard plays perfectly, so its moves come straight from the solved table
+        solved = (get_solved_table().lookup(cells)
+                  if classic and difficulty == "Hard" and self.mcts is None else None)
+        
+        # Opening move handling based on difficulty
+        if classic and len(moves) == 9:
+            if difficulty == "Hard":
+                # Optimal: center or corners only
+                best = random.choice([4, 0, 2, 6, 8])
+            elif difficulty == "Normal":
+                # Usually good moves, occasionally an edge
+                if random.random() < 0.2:
+                    best = random.choice([1, 3, 5, 7])  # Sometimes pick edge
+                else:
+                    best = random.choice([4, 0, 2, 6, 8])
+            else:  # Easy
+                # Any position is fair game
+                best = random.choice(moves)
+            return best, f"Opening move: Cell {best}"
+        if solved is not None:
+            score, best_moves = solved
+            best = random.choice(best_moves)
+            return best, (f"Difficulty: {difficulty} | Solved table\n\n"
+                          f"Best cells: {', '.join(map(str, best_moves))}\n"
+                          f"Score: {score:+d}\n\nChosen: Cell {best}")
+        # Random mistake
+        if random.random() < mistake and len(moves) > 1:
+            best = random.choice(moves)
+            return best, f"[Mistake] Random pick: Cell {best}"
+        
+        if self.mcts is not None:
+            return self._mcts_move(cells, ai, report, stats, k)
+        
+        # Calculate
+        lines = []
+        lines.append(f"Difficulty: {difficulty} | Depth: {depth} | Budget: {cfg['budget_ms']} ms")
+        lines.append(f"Evaluation: {eval_mode}\n")
+        
+        raw = {}
+        def record_raw(m, child): raw[m] = base_eval(child, ai)
+        start = time.perf_counter()
+        # Deepen until the difficulty's time budget runs out; one pass over
+        # the root moves gives both raw and search scores
+        order = MoveOrderer()      # Killers/history carry over between root moves
+        # The engine's table is shared by all root moves and iterations, and
+        # without noise by later turns and pondering. Noisy values are
+        # dropped after each turn, or every turn would replay one noise sample
+        if cfg["noise"] > 0:
+            self.tt.clear()
+        scores, reached = iterative_deepening(root, ai, eval_fn, cfg["budget_ms"], depth,
+                                              self.tt, order, stats, batch_eval, record_raw,
+                                              report)
+        scores.sort()
+        
+        lines.append("Raw Scores:")
+        for m in moves:
+            lines.append(f"  Cell {m}: {raw[m]:+.1f}")
+        
+        # Moves that cannot beat the best are only searched to an upper bound
+        lines.append("\nSearch Scores:")
+        for m, s, exact in scores:
+            lines.append(f"  Cell {m}: {s:+.1f}" if exact else f"  Cell {m}: <={s:+.1f}")
+        lines.append(f"  (depth reached: {reached})")
+        elapsed = time.perf_counter() - start
+        
+        lines.append("\nSearch Stats:")
+        lines.append(f"  Nodes: {stats.nodes} | Leaf evals: {stats.leaf_evals}")
+        lines.append(f"  Cutoffs: {stats.cutoffs} | Max depth: {stats.max_depth}")
+        lines.append(f"  Time: {elapsed * 1000:.1f} ms")
+        lines.append(f"  Table: {len(self.tt)} entries, {self.tt.hit_rate():.1%} hits")
+        if self.uses_model(cells) and not self.uses_table(cells):
+            lines.append(f"  Eval cache: {EVAL_CACHE.hit_rate():.1%} hits, {len(EVAL_CACHE)} entries")
+        lines.append("Per Move (nodes / ms):")
+        for m, entry in sorted(stats.root_moves.items()):
+            lines.append(f"  Cell {m}: {entry['nodes']} / {entry['ms']:.1f}")
+        
+        # Find best score and randomly pick among ties
+        best_score = max(s for m, s, _ in scores)
+        best_moves = [m for m, s, _ in scores if s == best_score]
+        best = random.choice(best_moves)  # Random among equally good moves
+        
+        # Sometimes pick suboptimal
+        if len(scores) > 1 and random.random() < mistake * 0.5:
+            # Rank by real values, not by the bounds of cut-off moves
+            scores = rescore_exact(root, ai, reached, eval_fn, scores, self.tt, order, stats,
+                                   batch_eval)
+            scores.sort(key=lambda x: x[1], reverse=True)
+            best = random.choice(scores[:3])[0]
+            lines.append("\n(Picked suboptimal)")
+        
+        lines.append(f"\nChosen: Cell {best}")
+        return best, "\n".join(lines)
+
+    def _mcts_move(self, cells, ai, report, stats, k):
+        cfg = DIFFICULTY[self.difficulty]
+        start = time.perf_counter()
+        # Visits already in the reused subtree count towards the playouts
+        self.mcts.set_root(cells, ai, k)
+        playouts = max(0, cfg["playouts"] - self.mcts.root.visits)
+        results = self.mcts.search(cells, ai, playouts, cfg["budget_ms"], stats, k)
+        elapsed = time.perf_counter() - start
+        best = self.mcts.best_move()
+        
+        lines = [f"Difficulty: {self.difficulty} | MCTS | Playouts: {cfg['playouts']} | "
+                 f"Budget: {cfg['budget_ms']} ms", "",
+                 "Visits / Win rate:"]
+        for m, visits, rate in results:
+            lines.append(f"  Cell {m}: {visits} / {rate:.1%}")
+            if report is not None:
+                report(m, rate * 100, True)
+        lines.append("\nSearch Stats:")
+        lines.append(f"  Playouts: {stats.leaf_evals} | Playout moves: {stats.nodes}")
+        lines.append(f"  Reused from last turn: {self.mcts.reused} visits")
+        lines.append(f"  Time: {elapsed * 1000:.1f} ms")
+        lines.append(f"\nChosen: Cell {best}")
+        return best, "\n".join(lines)
@@ -0,0 +1,107 @@
+# evalcache.py
+# Session-wide memo of static evaluations. Leaf positions repeat a lot
+# within one search and across turns, so the base value is cached per
+# (position, player, evaluator); any noise is added by the caller after
+# the lookup.
+from collections import OrderedDict
+
+
+class EvalCache:
+    """Bounded LRU cache of evaluator results.
+
+    Keys are (board.raw_key(), player, evaluator). The exact position key
+    is used rather than the symmetry-reduced board.key(), which costs more
+    than the evaluations it would save. evaluator is a string naming the
+    evaluation function; invalidate(prefix) drops the entries of matching
+    evaluators, e.g. every "ML" model after retraining.
+
+    Not thread-safe: one search at a time may use it (main.py joins the
+    previous search and ponder threads before starting the next search).
+    """
+
+    def __init__(self, max_size=200_000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def wrap(self, eval_fn, evaluator):
+        """eval_fn(board, player) with results served from this cache"""
+        entries = self.entries
+
+        def cached_eval(board, player):
+            key = (board.raw_key(), player, evaluator)
+            value = entries.get(key)
+            if value is not None:
+                self.hits += 1
+                entries.move_to_end(key)
+                return value
+            self.misses += 1
+            value = entries[key] = eval_fn(board, player)
+            if len(entries) > self.max_size:
+                entries.popitem(last=False)
+                self.evictions += 1
+            return value
+
+        return cached_eval
+
+    def wrap_batch(self, batch_fn, evaluator):
+        """batch_fn(rows, player, board) that only evaluates the rows not cached.
+
+        Rows are keyed like Board.raw_key(), so they share entries with wrap()
+        for the same evaluator.
+        """
+        entries = self.entries
+
+        def cached_batch(rows, player, board):
+            keys = [((board.k, tuple(row)), player, evaluator) for row in rows]
+            values = [entries.get(key) for key in keys]
+            missing = [i for i, v in enumerate(values) if v is None]
+            self.hits += len(rows) - len(missing)
+            self.misses += len(missing)
+            for key, v in zip(keys, values):
+                if v is not None:
+                    entries.move_to_end(key)
+            if missing:
+                fresh = batch_fn([rows[i] for i in missing], player, board)
+                for i, v in zip(missing, fresh):
+                    values[i] = entries[keys[i]] = v
+                while len(entries) > self.max_size:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+            return values
+
+        return cached_batch
+
+    def invalidate(self, prefix=None):
+        """Drop entries whose evaluator starts with prefix, or everything"""
+        if prefix is None:
+            self.entries.clear()
+            return
+        for key in [k for k in self.entries if k[2].startswith(prefix)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate(), 4),
+        }
+
+
+# Shared by every engine in this process for the whole session
+EVAL_CACHE = EvalCache()
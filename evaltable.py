@@ -0,0 +1,144 @@
+# evaltable.py
+# Dense lookup tables of static evaluations for every 3x3 cell
+# configuration (3^9 base-3 codes, for both players). Tables are built
+# once, cached on disk and memory-mapped, so a leaf evaluation is a
+# single index with the board's incrementally maintained code.
+import mmap
+import os
+import sys
+from array import array
+from board import BitBoard
+from heuristic import classical_eval
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MAGIC = b"TTE1"
+N_CODES = 3 ** 9
+HEADER_SIZE = 64  # Magic, typecode, tag; keeps the values 8-byte aligned
+
+
+def all_cells():
+    """Cell list for every base-3 code, in code order"""
+    rows = []
+    for code in range(N_CODES):
+        cells = []
+        for _ in range(9):
+            cells.append("-XO"[code % 3])
+            code //= 3
+        rows.append(cells)
+    return rows
+
+
+class EvalTable:
+    """Values indexed by board.code, then by player ('X' first, 'O' + N_CODES).
+
+    Reading happens through a memoryview over a read-only mmap of the
+    table file. Pickling keeps only the path and tag, so evaluate can be
+    handed to the root-parallel worker pool; each process maps the file.
+    """
+
+    def __init__(self, path, tag):
+        self.path = path
+        self.tag = tag
+        self._map()
+
+    def _map(self):
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if header[:4] != MAGIC or header[6:HEADER_SIZE].rstrip(b"\0") != self.tag.encode():
+                raise ValueError(f"{self.path} is not an eval table for {self.tag}")
+            typecode = chr(header[4])
+            if sys.byteorder != "little":
+                # Stored little-endian: read and swap instead of mapping
+                values = array(typecode)
+                values.frombytes(f.read())
+                values.byteswap()
+                self.values = values
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.values = memoryview(mm)[HEADER_SIZE:].cast(typecode)
+        if len(self.values) != 2 * N_CODES:
+            raise ValueError(f"{self.path} is truncated")
+
+    def __getstate__(self):
+        return {"path": self.path, "tag": self.tag}
+
+    def __setstate__(self, state):
+        self.path, self.tag = state["path"], state["tag"]
+        self._map()
+
+    def evaluate(self, board, player):
+        return self.values[board.code + N_CODES if player == 'O' else board.code]
+
+
+def write_table(path, values, tag):
+    values = array(values.typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    header = MAGIC + values.typecode.encode() + b"\0" + tag.encode()
+    if len(header) > HEADER_SIZE:
+        raise ValueError(f"tag too long: {tag}")
+    # Replace rather than overwrite: other tables may still map the old file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        values.tofile(f)
+    os.replace(tmp, path)
+
+
+def build_classical():
+    values = array('h', [0] * (2 * N_CODES))
+    for code, cells in enumerate(all_cells()):
+        board = BitBoard(cells)
+        values[code] = classical_eval(board, 'X')
+        values[code + N_CODES] = classical_eval(board, 'O')
+    return values
+
+
+def build_model(model):
+    # Models score from X's view, so O's half is the negation
+    scores = model.evaluate_batch(all_cells(), 'X', BitBoard())
+    return array('d', scores + [-v for v in scores])
+
+
+_tables = {}
+
+def get_table(name, build, tag):
+    """Memory-map table `name`, building and saving it first if missing or stale"""
+    path = os.path.join(SCRIPT_DIR, f"eval_table_{name}.bin")
+    if path not in _tables or _tables[path].tag != tag:
+        try:
+            table = EvalTable(path, tag)
+        except (OSError, ValueError):
+            try:
+                write_table(path, build(), tag)
+                table = EvalTable(path, tag)
+            except OSError:
+                return None  # Read-only install: callers evaluate directly
+        _tables[path] = table
+    return _tables[path]
+
+
+def source_digest(*modules):
+    """Short hash of the modules' source files"""
+    import hashlib
+    h = hashlib.sha1()
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+def classical_table():
+    # Tagged with a hash of heuristic.py and of board.py, whose line counters
+    # classical_eval reads, so a change to either rebuilds the table
+    import board
+    import heuristic
+    return get_table("classical", build_classical, f"classical:{source_digest(heuristic, board)}")
+
+
+def model_table(model):
+    """Table of a trained model's values; regenerated when its parameters or ml_model.py change"""
+    import ml_model
+    return get_table(model.kind, lambda: build_model(model),
+                     f"{model.fingerprint()}:{source_digest(ml_model)}")
@@ -1,12 +1,16 @@
+import time
+START_TIME = time.perf_counter()
+
 import customtkinter as ctk
 from board import Board, WIN_LINES
-from alphabeta import alphabeta
-from heuristic import classical_eval
-from trainer import train
-import random
+from alphabeta import SearchStats, SearchCancelled
+from engine import Engine, EVAL_MODES, ML_MODES
+from trainer import load_or_train, load_cached_model, DATASET_PATH
+from ml_model import MODELS
+from evaltable import classical_table
 import os
-import time
-import pygame
+import queue
+import threading
 import sys
 
 # Suppress Tkinter after-event errors on window close
@@ -21,9 +25,6 @@ class SuppressTkErrors:
 
 sys.stderr = SuppressTkErrors(sys.stderr)
 
-# Initialize pygame mixer for sounds
-pygame.mixer.init()
-
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -99,142 +100,101 @@ THEMES = {
     },
 }
 
-# ---------- Splash Screen with Loading Bar ----------
-def show_splash():
-    ctk.set_appearance_mode("dark")
-    
-    splash = ctk.CTk()
-    splash.title("Loading...")
-    splash.geometry("400x200")
-    splash.resizable(False, False)
-    splash.configure(fg_color="#0d1117")
-    
-    # Center the window
-    splash.update_idletasks()
-    x = (splash.winfo_screenwidth() - 400) // 2
-    y = (splash.winfo_screenheight() - 200) // 2
-    splash.geometry(f"400x200+{x}+{y}")
-    
-    # Keep on top
-    splash.attributes("-topmost", True)
-    splash.lift()
-    splash.focus_force()
-    
-    # Title
-    title = ctk.CTkLabel(splash, text="🎮 Tic-Tac-Toe AI", 
-                         font=("Arial", 24, "bold"), text_color="#ffffff")
-    title.pack(pady=(40, 10))
-    
-    # Status label
-    status = ctk.CTkLabel(splash, text="Initializing...", 
-                          font=("Arial", 12), text_color="#8b949e")
-    status.pack(pady=(5, 15))
-    
-    # Progress bar
-    progress = ctk.CTkProgressBar(splash, width=300, height=15, 
-                                   corner_radius=8, fg_color="#21262d",
-                                   progress_color="#238636")
-    progress.pack(pady=10)
-    progress.set(0)
-    
-    model = None
-    
-    # Step 1: Initialize (0-30%)
-    status.configure(text="Loading components...")
-    for i in range(30):
-        progress.set(i / 100)
-        splash.update()
-        time.sleep(0.01)
-    
-    # Step 2: Train model (30-80%)
-    status.configure(text="Training ML model...")
-    splash.update()
-    
-    try:
-        dataset_path = os.path.join(SCRIPT_DIR, "tictactoe_dataset.csv")
-        if os.path.exists(dataset_path):
-            model = train(silent=True)
-            for i in range(30, 80):
-                progress.set(i / 100)
-                splash.update()
-                time.sleep(0.008)
-        else:
-            status.configure(text="Dataset not found, using classical only...")
-            splash.update()
-            for i in range(30, 80):
-                progress.set(i / 100)
-                splash.update()
-                time.sleep(0.01)
-    except Exception as e:
-        status.configure(text=f"ML training failed...")
-        splash.update()
-        time.sleep(0.3)
-    
-    # Step 3: Finalize (80-100%)
-    status.configure(text="Starting game...")
-    for i in range(80, 101):
-        progress.set(i / 100)
-        splash.update()
-        time.sleep(0.01)
-    
-    time.sleep(0.2)
-    
-    # Suppress Tkinter errors on close
-    try:
-        splash.destroy()
-    except:
-        pass
-    
-    return model
-
-# ---------- Train model with splash screen ----------
-import sys
-import io
-
-# Suppress pygame welcome message
-sys.stdout = io.StringIO()
-pygame.init()
-sys.stdout = sys.__stdout__
-
-model = show_splash()
-
-# ---------- ML evaluation ----------
-def extract_features(board):
-    X = board.cells.count('X')
-    O = board.cells.count('O')
-    X_almost = 0
-    O_almost = 0
-    for line in WIN_LINES:
-        xs = sum(board.cells[i] == 'X' for i in line)
-        os = sum(board.cells[i] == 'O' for i in line)
-        if xs == 2 and os == 0:
-            X_almost += 1
-        if os == 2 and xs == 0:
-            O_almost += 1
-    X_center = 1 if board.cells[4] == 'X' else 0
-    X_corners = sum(board.cells[i] == 'X' for i in [0, 2, 6, 8])
-    return [X, O, X_almost, O_almost, X_center, X_corners]
-
-def ml_eval(board, player):
-    if model is None:
-        return classical_eval(board, player)
-    score = model.predict_from_features(extract_features(board))
-    return score if player == 'X' else -score
-
-# ---------- Difficulty ----------
-DIFFICULTY = {
-    "Easy":   {"depth": 1, "mistake": 0.50, "noise": 5.0},   # Very shallow, lots of mistakes
-    "Normal": {"depth": 3, "mistake": 0.20, "noise": 1.5},   # Moderate depth, some mistakes
-    "Hard":   {"depth": 9, "mistake": 0.0,  "noise": 0.0}    # Perfect play
-}
+# ---------- Startup timing ----------
+class StartupProfile:
+    """Per-phase startup timings, printed when run with --profile-startup"""
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.last = START_TIME
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        for name, elapsed in self.phases:
+            print(f"{name:<14}{elapsed * 1000:8.1f} ms")
+        print(f"{'total':<14}{(self.last - START_TIME) * 1000:8.1f} ms")
+
+# ---------- Models ----------
+def load_models():
+    """Trained models whose disk cache is valid; the others load on first use"""
+    models = {}
+    for kind in MODELS:
+        if kind == "linear" and not os.path.exists(DATASET_PATH):
+            continue  # No data: that mode evaluates classically
+        try:
+            cached = load_cached_model(kind=kind)
+        except OSError:
+            cached = None
+        if cached is not None:
+            models[kind] = cached
+    return models
+
+def request_model(kind):
+    """Load, or train, a model kind on a background thread; returns that thread.
+
+    Called when its Eval entry is selected, so training never blocks startup.
+    None when there is nothing to load.
+    """
+    if kind is None or kind in models:
+        return None
+    if kind not in model_loaders:
+        if kind == "linear" and not os.path.exists(DATASET_PATH):
+            return None
+        def load():
+            try:
+                models[kind] = load_or_train(silent=True, kind=kind)
+            except Exception:
+                pass  # The mode evaluates classically without its model
+        model_loaders[kind] = threading.Thread(target=load, daemon=True)
+        model_loaders[kind].start()
+    return model_loaders[kind]
+
+def request_table():
+    """Map, or build, the classical evaluation table on a background thread; returns that thread.
+
+    Started once the window is up; the first AI turn joins it before
+    building its engine, so the table is never written by two threads.
+    """
+    global table_loader
+    if table_loader is None:
+        table_loader = threading.Thread(target=classical_table, daemon=True)
+        table_loader.start()
+    return table_loader
+
+# Trained models by kind: cached ones from main(), the rest added by
+# request_model. ML modes fall back to classical evaluation without theirs
+models = {}
+
+# Threads started by request_model, by kind
+model_loaders = {}
+
+# Thread started by request_table
+table_loader = None
 
-def noisy_eval(board, player, eval_fn, noise):
-    base = eval_fn(board, player)
-    return base + random.uniform(-noise, noise) if noise > 0 else base
+# JSON-lines file for per-move search statistics (--trace PATH)
+trace_path = None
+
+# Search ahead while the human thinks (off with --no-ponder)
+ponder_enabled = True
+
+# How often the Tk loop checks the search worker (~60fps)
+POLL_MS = 16
+
+# Sounds are loaded shortly after the window is up, off the startup path
+SOUND_PRELOAD_MS = 500
+
+# Likewise the classical evaluation table (built on first run, then mapped)
+TABLE_PRELOAD_MS = 100
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, profile=None):
         # Window
         self.root = ctk.CTk()
         self.root.title("Tic-Tac-Toe AI")
@@ -245,7 +205,7 @@ class Game:
         self.current_theme = "Dark"
         self.theme = THEMES[self.current_theme]
         self.sounds_enabled = True
-        self.load_sounds()
+        self.sounds = None  # Loaded on demand so pygame stays off the startup path
         
         # Score tracking
         self.scores = {"player": 0, "ai": 0, "draw": 0}
@@ -260,16 +220,39 @@ class Game:
         self.eval_mode = "Classical"
         self.waiting = False
         self.winning_line = None
+        self.search_cancel = None  # Set to abort the in-flight AI search
+        self.engine = None         # AI for the current game and settings
+        self.ponder_cancel = None  # Set to stop pondering on the human's time
+        self.ponder_thread = None
+        self.search_thread = None  # Worker of the latest AI search
+        self.pending_ai = None     # after() id of a scheduled ai_turn
         
         self.apply_theme()
         self.build_ui()
+        
+        # Startup timing: the window is interactive once Tk goes idle
+        self.profile = profile
+        if profile is not None:
+            profile.mark("window")
+            self.root.after_idle(self.startup_done)
+        self.root.after(SOUND_PRELOAD_MS, self.load_sounds)
+        self.root.after(TABLE_PRELOAD_MS, request_table)
         self.root.mainloop()
 
+    def startup_done(self):
+        self.profile.mark("interactive")
+        self.profile.report()
+
     def load_sounds(self):
-        """Load sound effects"""
+        """Load sound effects (imports pygame on first use)"""
+        if self.sounds is not None or not self.sounds_enabled:
+            return
         self.sounds = {}
         sound_dir = os.path.join(SCRIPT_DIR, "sounds")
         try:
+            os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+            import pygame
+            pygame.mixer.init()
             self.sounds["click"] = pygame.mixer.Sound(os.path.join(sound_dir, "click.wav"))
             self.sounds["win"] = pygame.mixer.Sound(os.path.join(sound_dir, "win.wav"))
             self.sounds["lose"] = pygame.mixer.Sound(os.path.join(sound_dir, "lose.wav"))
@@ -279,6 +262,8 @@ class Game:
 
     def play_sound(self, name):
         """Play a sound effect if enabled"""
+        if self.sounds_enabled and self.sounds is None:
+            self.load_sounds()
         if self.sounds_enabled and name in self.sounds:
             try:
                 self.sounds[name].play()
@@ -411,8 +396,8 @@ class Game:
         
         ctk.CTkLabel(row2, text="Eval", font=("Arial", 12), 
                      text_color=self.theme["text_dim"]).pack(side="left")
-        self.eval_btn = ctk.CTkSegmentedButton(row2, values=["Classical", "ML"],
-                                                command=self.set_eval, width=140)
+        self.eval_btn = ctk.CTkOptionMenu(row2, values=list(EVAL_MODES),
+                                          command=self.set_eval, width=120)
         self.eval_btn.set("Classical")
         self.eval_btn.pack(side="left", padx=(8, 20))
         
@@ -503,10 +488,15 @@ class Game:
     def set_diff(self, v):
         if not self.waiting and self.is_fresh():
             self.difficulty = v
+            self.engine = None
 
     def set_eval(self, v):
+        # Start getting the model ready now; it applies from the next game
+        # if this one has already started
+        request_model(ML_MODES.get(v))
         if not self.waiting and self.is_fresh():
             self.eval_mode = v
+            self.engine = None
 
     def is_fresh(self):
         return self.board.cells.count('-') == 9
@@ -520,6 +510,7 @@ class Game:
         self.play_sound("click")
         
         # Human move
+        self.stop_ponder()
         self.board.make_move(i, self.player)
         self.add_to_history(self.player, i)
         self.draw()
@@ -532,73 +523,102 @@ class Game:
         self.waiting = True
         self.status.configure(text="AI thinking...", text_color=self.theme["text_dim"])
         self.root.update()
-        self.root.after(200, self.ai_turn)
+        self.pending_ai = self.root.after(200, self.ai_turn)
 
     def ai_turn(self):
+        """Start the AI search on a worker thread and poll it from Tk"""
+        self.pending_ai = None
         ai = "O" if self.player == "X" else "X"
-        cfg = DIFFICULTY[self.difficulty]
-        depth, mistake, noise = cfg["depth"], cfg["mistake"], cfg["noise"]
-        
-        base_eval = classical_eval if self.eval_mode == "Classical" else ml_eval
-        def eval_fn(b, p): return noisy_eval(b, p, base_eval, noise)
-        
-        moves = self.board.legal_moves()
-        
-        # Opening move handling based on difficulty
-        if len(moves) == 9:
-            if self.difficulty == "Hard":
-                # Optimal: center or corners only
-                best = random.choice([4, 0, 2, 6, 8])
-            elif self.difficulty == "Normal":
-                # Usually good moves, occasionally an edge
-                if random.random() < 0.2:
-                    best = random.choice([1, 3, 5, 7])  # Sometimes pick edge
-                else:
-                    best = random.choice([4, 0, 2, 6, 8])
-            else:  # Easy
-                # Any position is fair game
-                best = random.choice(moves)
-            self.write_log(f"Opening move: Cell {best}")
-        # Random mistake
-        elif random.random() < mistake and len(moves) > 1:
-            best = random.choice(moves)
-            self.write_log(f"[Mistake] Random pick: Cell {best}")
-        else:
-            # Calculate
-            lines = []
-            lines.append(f"Difficulty: {self.difficulty} | Depth: {depth}")
-            lines.append(f"Evaluation: {self.eval_mode}\n")
-            lines.append("Raw Scores:")
-            
-            for m in moves:
-                b = self.board.copy()
-                b.make_move(m, ai)
-                raw = base_eval(b, ai)
-                lines.append(f"  Cell {m}: {raw:+.1f}")
-            
-            lines.append("\nSearch Scores:")
-            scores = []
-            for m in moves:
-                b = self.board.copy()
-                b.make_move(m, ai)
-                s = alphabeta(b, depth, -9999, 9999, False, ai, eval_fn)
-                scores.append((m, s))
-                lines.append(f"  Cell {m}: {s:+.1f}")
-            
-            # Find best score and randomly pick among ties
-            best_score = max(s for m, s in scores)
-            best_moves = [m for m, s in scores if s == best_score]
-            best = random.choice(best_moves)  # Random among equally good moves
-            
-            # Sometimes pick suboptimal
-            if len(scores) > 1 and random.random() < mistake * 0.5:
-                scores.sort(key=lambda x: x[1], reverse=True)
-                best = random.choice(scores[:3])[0]
-                lines.append("\n(Picked suboptimal)")
-            
-            lines.append(f"\nChosen: Cell {best}")
-            self.write_log("\n".join(lines))
-        
+        cancel = threading.Event()
+        results = queue.Queue()
+        self.search_cancel = cancel
+        self.search_scores = {}
+        # Kept for the whole game so MCTS can reuse its tree between turns
+        engine = self.engine
+        difficulty, eval_mode = self.difficulty, self.eval_mode
+        kind = ML_MODES.get(eval_mode)
+        loader = request_model(kind) if engine is None else None
+        table = request_table() if engine is None else None
+        cells = list(self.board.cells)
+        # Pondering and searches of an abandoned game may still be unwinding;
+        # they share the engine or EVAL_CACHE, which is not thread-safe
+        previous = [t for t in (self.ponder_thread, self.search_thread) if t is not None]
+        self.ponder_thread = None
+
+        def worker():
+            for thread in previous:
+                thread.join()
+            ai_engine = engine
+            if ai_engine is None:
+                if loader is not None and loader.is_alive():
+                    results.put(("status", f"Preparing the {eval_mode} model..."))
+                    loader.join()
+                table.join()
+                # Built here: mapping a new model's eval table takes a moment
+                ai_engine = Engine(difficulty, eval_mode, models.get(kind),
+                                   trace_path=trace_path)
+                results.put(("engine", ai_engine))
+            stats = SearchStats()
+            stats.cancel = cancel
+            def report(m, s, exact): results.put(("score", m, s, exact))
+            try:
+                best, log = ai_engine.choose_move(cells, ai, report, stats)
+            except SearchCancelled:
+                return
+            results.put(("done", best, log))
+
+        self.search_thread = threading.Thread(target=worker, daemon=True)
+        self.search_thread.start()
+        self.root.after(POLL_MS, self.poll_search, results, cancel)
+
+    def start_ponder(self):
+        """Let the engine search ahead on a background thread until the human moves"""
+        if not ponder_enabled or self.engine is None:
+            return
+        self.stop_ponder()
+        cancel = threading.Event()
+        self.ponder_cancel = cancel
+        self.ponder_thread = threading.Thread(
+            target=self.engine.ponder, args=(list(self.board.cells), self.player, cancel),
+            daemon=True)
+        self.ponder_thread.start()
+
+    def stop_ponder(self):
+        if self.ponder_cancel is not None:
+            self.ponder_cancel.set()
+            self.ponder_cancel = None
+
+    def poll_search(self, results, cancel):
+        """Drain worker messages; reschedule until the search finishes"""
+        if cancel.is_set():
+            return
+        while True:
+            try:
+                msg = results.get_nowait()
+            except queue.Empty:
+                break
+            if msg[0] == "done":
+                self.finish_ai_turn(msg[1], msg[2])
+                return
+            if msg[0] == "engine":
+                self.engine = msg[1]
+                continue
+            if msg[0] == "status":
+                self.write_log(msg[1])
+                continue
+            # Stream per-move scores into the analysis panel; a deeper
+            # iteration's score replaces the previous one. Cut-off moves only
+            # have an upper bound, marked <= as in the final analysis
+            self.search_scores[msg[1]] = (msg[2], msg[3])
+            self.write_log("Searching...\n\n" + "\n".join(
+                f"  Cell {m}: {'' if exact else '<='}{s:+.1f}"
+                for m, (s, exact) in sorted(self.search_scores.items())))
+        self.root.after(POLL_MS, self.poll_search, results, cancel)
+
+    def finish_ai_turn(self, best, log):
+        ai = "O" if self.player == "X" else "X"
+        self.search_cancel = None
+        self.write_log(log)
         self.board.make_move(best, ai)
         self.add_to_history(ai, best)
         self.play_sound("click")
@@ -609,6 +629,7 @@ class Game:
         else:
             self.waiting = False
             self.status.configure(text="Your turn", text_color=self.theme["win"])
+            self.start_ponder()
 
     def draw(self):
         colors = {"X": self.theme["x_color"], "O": self.theme["o_color"], "-": self.theme["text"]}
@@ -646,7 +667,17 @@ class Game:
         self.waiting = True  # Prevent further clicks
 
     def reset(self):
+        # Abandon any AI search still running for the old game
+        if self.pending_ai is not None:
+            self.root.after_cancel(self.pending_ai)
+            self.pending_ai = None
+        if self.search_cancel is not None:
+            self.search_cancel.set()
+            self.search_cancel = None
+        # Cancelled threads are joined by the next search before it starts
+        self.stop_ponder()
         self.board = Board()
+        self.engine = None
         self.waiting = False
         self.player = self.player_btn.get()
         self.difficulty = self.diff_btn.get()
@@ -667,9 +698,21 @@ class Game:
         if self.player == "O":
             self.waiting = True
             self.status.configure(text="AI thinking...", text_color=self.theme["text_dim"])
-            self.root.after(300, self.ai_turn)
+            self.pending_ai = self.root.after(300, self.ai_turn)
+
+
+def main():
+    global models, trace_path, ponder_enabled
+    profile = StartupProfile("--profile-startup" in sys.argv)
+    if "--trace" in sys.argv[:-1]:
+        trace_path = sys.argv[sys.argv.index("--trace") + 1]
+    ponder_enabled = "--no-ponder" not in sys.argv
+    profile.mark("imports")
+    models = load_models()
+    profile.mark("models")
+    ctk.set_appearance_mode("dark")
+    Game(profile)
 
 
 if __name__ == "__main__":
-    ctk.set_appearance_mode("dark")
-    Game()
+    main()
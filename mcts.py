@@ -0,0 +1,171 @@
+# mcts.py
+# Monte Carlo tree search (UCT) over Board/BitBoard. Playouts are random
+# moves made and undone in place on one board; an evaluation function can
+# cut them off early. The tree is kept between turns: when the game has
+# moved on by the AI's move and the reply, the matching subtree becomes
+# the new root.
+import math
+import random
+import time
+from board import make_board
+from alphabeta import SearchCancelled
+
+OTHER = {'X': 'O', 'O': 'X'}
+
+
+def _make_board(cells, k=None):
+    n = math.isqrt(len(cells))
+    return make_board(list(cells), n, k if k is not None else min(n, 5))
+
+
+class Node:
+    """Tree node for the position after `move` was played by `mover`.
+
+    value sums playout results from mover's point of view (1 win,
+    0.5 draw, 0 loss).
+    """
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "value")
+
+    def __init__(self, move, mover, parent, moves):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = {}
+        self.untried = list(moves)
+        self.visits = 0
+        self.value = 0.0
+
+
+class MCTS:
+    """UCT search that reuses its tree across calls.
+
+    c is the exploration constant. With eval_fn and playout_depth, playouts
+    stop after playout_depth random moves and score the position with
+    0.5 + 0.5 * tanh(eval_fn(board, 'X') / eval_scale) instead of playing
+    to the end (eval_scale 50 suits classical_eval, about 1 the ML model).
+    """
+
+    def __init__(self, c=1.4, eval_fn=None, playout_depth=None, eval_scale=50.0, rng=None):
+        self.c = c
+        self.eval_fn = eval_fn
+        self.playout_depth = playout_depth
+        self.eval_scale = eval_scale
+        self.rng = rng or random.Random()
+        self.root = None
+        self.root_cells = None
+        self.reused = 0  # Visits inherited by the current root
+
+    def set_root(self, cells, player, k=None):
+        """Point the root at this position, keeping its subtree if it is in the tree"""
+        cells = list(cells)
+        node = self._find(cells, player)
+        if node is None:
+            board = _make_board(cells, k)
+            node = Node(None, OTHER[player], None,
+                        board.legal_moves() if board.winner() is None else ())
+        node.parent = None
+        self.root, self.root_cells = node, cells
+        self.reused = node.visits
+
+    def _find(self, cells, player):
+        # Follow the moves played since the last search down the tree
+        if self.root is None or len(cells) != len(self.root_cells):
+            return None
+        new = [i for i, (a, b) in enumerate(zip(self.root_cells, cells)) if a != b]
+        if any(self.root_cells[i] != '-' for i in new):
+            return None  # Not a continuation of the previous position
+        node = self.root
+        while new:
+            mover = OTHER[node.mover]
+            move = next((m for m in new if cells[m] == mover and m in node.children), None)
+            if move is None:
+                return None
+            node = node.children[move]
+            new.remove(move)
+        return node if node.mover == OTHER[player] else None
+
+    def search(self, cells, player, iterations=None, budget_ms=None, stats=None, k=None):
+        """Run UCT from this position for `player` to move.
+
+        Stops after `iterations` playouts or `budget_ms`, whichever comes
+        first (at least one must be given). Returns [(move, visits, win
+        rate)] for every root move. stats.nodes counts playout moves and
+        stats.cancel aborts with SearchCancelled. k is the win length for
+        boards larger than 3x3 (default as for Board).
+        """
+        self.set_root(cells, player, k)
+        board = _make_board(cells, k)
+        root = self.root
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+        rng, c = self.rng, self.c
+        done = 0
+        while root.untried or root.children:
+            if iterations is not None and done >= iterations:
+                break
+            if stats is not None:
+                if stats.cancel is not None and stats.cancel.is_set():
+                    raise SearchCancelled
+            if deadline is not None and not done & 63 and time.perf_counter() > deadline:
+                break
+            done += 1
+
+            # Selection: descend by UCT while every child has been tried
+            node, path = root, []
+            while not node.untried and node.children:
+                log_n = math.log(node.visits)
+                node = max(node.children.values(),
+                           key=lambda ch: ch.value / ch.visits + c * math.sqrt(log_n / ch.visits))
+                board.make_move(node.move, node.mover)
+                path.append(node.move)
+
+            # Expansion
+            if node.untried:
+                move = node.untried.pop(rng.randrange(len(node.untried)))
+                mover = OTHER[node.mover]
+                board.make_move(move, mover)
+                path.append(move)
+                child = Node(move, mover, node,
+                             board.legal_moves() if board.winner() is None else ())
+                node.children[move] = child
+                node = child
+
+            # Playout
+            result = self._playout(board, OTHER[node.mover], path, stats)
+
+            # Backpropagation; result is from X's point of view
+            while node is not None:
+                node.visits += 1
+                node.value += result if node.mover == 'X' else 1.0 - result
+                node = node.parent
+            for move in reversed(path):
+                board.undo_move(move)
+
+        if stats is not None:
+            stats.leaf_evals += done
+        return [(m, ch.visits, ch.value / ch.visits if ch.visits else 0.0)
+                for m, ch in sorted(root.children.items())]
+
+    def _playout(self, board, turn, path, stats):
+        """Random moves until the game ends (or the cutoff); moves are added to path"""
+        rng = self.rng
+        plies = 0
+        while True:
+            w = board.winner()
+            if w is not None:
+                return 1.0 if w == 'X' else 0.0 if w == 'O' else 0.5
+            if self.eval_fn is not None and self.playout_depth is not None \
+                    and plies >= self.playout_depth:
+                v = math.tanh(self.eval_fn(board, 'X') / self.eval_scale)
+                return 0.5 + 0.5 * v
+            moves = board.legal_moves()
+            move = moves[rng.randrange(len(moves))]
+            board.make_move(move, turn)
+            path.append(move)
+            turn = OTHER[turn]
+            plies += 1
+            if stats is not None:
+                stats.nodes += 1
+
+    def best_move(self):
+        """Most visited root move"""
+        return max(self.root.children.values(), key=lambda ch: ch.visits).move
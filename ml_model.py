@@ -1,10 +1,237 @@
 # ml_model.py
+import json
+
+def extract_features(board):
+    # Counts are maintained incrementally by the board
+    return [
+        board.count['X'],
+        board.count['O'],
+        board.near['X'],
+        board.near['O'],
+        board.center['X'],
+        board.corner['X'],
+    ]
+
+
+# ---------- Batched features (NumPy, imported on first use) ----------
+_GEOMETRY = {}
+
+def _geometry(board):
+    # Line incidence matrix (lines x cells) and center/corner indices per board size
+    key = (board.n, board.k)
+    if key not in _GEOMETRY:
+        import numpy as np
+        L = np.zeros((len(board.lines), board.n * board.n), dtype=np.int8)
+        for j, line in enumerate(board.lines):
+            L[j, list(line)] = 1
+        _GEOMETRY[key] = (L.T.copy(), list(board.centers), list(board.corners))
+    return _GEOMETRY[key]
+
+def batch_features(rows, board):
+    """Feature matrix (len(rows) x 6) for many cell lists of board's geometry"""
+    import numpy as np
+    LT, centers, corners = _geometry(board)
+    # One bytes buffer for the whole batch is much faster than np.array(rows)
+    flat = "".join(["".join(r) for r in rows]).encode("ascii")
+    cells = np.frombuffer(flat, dtype=np.uint8).reshape(len(rows), -1)
+    X = (cells == ord('X')).astype(np.int8)
+    O = (cells == ord('O')).astype(np.int8)
+    xs = X @ LT  # Marks per line, one row per board
+    os = O @ LT
+    near = board.k - 1
+    return np.column_stack([
+        X.sum(axis=1),
+        O.sum(axis=1),
+        ((xs == near) & (os == 0)).sum(axis=1),
+        ((os == near) & (xs == 0)).sum(axis=1),
+        X[:, centers].sum(axis=1),
+        X[:, corners].sum(axis=1),
+    ]).astype(np.float64)
+
+
+# ---------- One-hot cell encoding ----------
+# Three inputs per cell (empty, X, O): 27 for the 3x3 board
+CELL_CODE = {'-': 0, 'X': 1, 'O': 2}
+
+def onehot_features(board):
+    features = [0.0] * (3 * len(board.cells))
+    for i, c in enumerate(board.cells):
+        features[3 * i + CELL_CODE[c]] = 1.0
+    return features
+
+def batch_onehot(rows, board=None):
+    """One-hot matrix (len(rows) x 3 * cells) for many cell lists"""
+    import numpy as np
+    flat = "".join(["".join(r) for r in rows]).encode("ascii")
+    cells = np.frombuffer(flat, dtype=np.uint8).reshape(len(rows), -1)
+    F = np.stack([cells == ord(c) for c in "-XO"], axis=2)
+    return F.reshape(len(rows), -1).astype(np.float64)
+
+
+class Model:
+    """Interface shared by the models in MODELS.
+
+    Subclasses set kind and define features(board), batch_features(rows,
+    board), predict(F) for a 2-D feature array and to_dict/from_dict for
+    serialization. Scores are from X's point of view; evaluate and
+    evaluate_batch flip them for O. board_size is the number of cells the
+    inputs are laid out for (None if the features fit any board), and
+    symmetric is True if rotated or reflected positions always score the
+    same, so searches may share their transposition table entries.
+    """
+    kind = None
+    board_size = None
+    symmetric = False
+
+    def evaluate(self, board, player):
+        import numpy as np
+        score = float(self.predict(np.asarray([self.features(board)]))[0])
+        return score if player == 'X' else -score
+
+    def evaluate_batch(self, rows, player, board):
+        """Score many cell lists at once (same convention as evaluate)"""
+        scores = self.predict(self.batch_features(rows, board))
+        return (scores if player == 'X' else -scores).tolist()
+
+    def fingerprint(self):
+        """Short string that changes whenever the parameters do"""
+        import hashlib
+        data = json.dumps(self.to_dict(), sort_keys=True).encode()
+        return f"{self.kind}:{hashlib.sha1(data).hexdigest()[:12]}"
+
+    def save(self, path, key=None):
+        """Write the parameters to a small JSON artifact"""
+        with open(path, "w") as f:
+            json.dump(dict(self.to_dict(), kind=self.kind, key=key), f)
+
+    @classmethod
+    def load(cls, path, key=None):
+        """Load a saved model; returns None if missing, corrupt, stale or of another kind"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if key is not None and data.get("key") != key:
+                return None
+            if data.get("kind", "linear") != cls.kind:
+                return None
+            return cls.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+class LinearModel(Model):
+    """Linear regression on the six extract_features features"""
+    kind = "linear"
+    n_features = 6
+    symmetric = True    # Counts, lines, center and corners are all symmetric
 
-class LinearModel:
     def __init__(self):
-        # 6 features
-        self.weights = [0.0] * 6
+        self.weights = [0.0] * self.n_features
         self.bias = 0.0
 
+    def features(self, board):
+        return extract_features(board)
+
+    def batch_features(self, rows, board):
+        return batch_features(rows, board)
+
     def predict_from_features(self, features):
         return sum(w * x for w, x in zip(self.weights, features)) + self.bias
+
+    def evaluate(self, board, player):
+        # Model scores positions from X's point of view
+        score = self.predict_from_features(self.features(board))
+        return score if player == 'X' else -score
+
+    def predict(self, F):
+        return F @ self._weight_vector() + self.bias
+
+    predict_batch = predict
+
+    def _weight_vector(self):
+        import numpy as np
+        return np.asarray(self.weights, dtype=np.float64)
+
+    def to_dict(self):
+        return {"weights": self.weights, "bias": self.bias}
+
+    @classmethod
+    def from_dict(cls, data):
+        model = cls()
+        weights = [float(w) for w in data["weights"]]
+        if len(weights) != cls.n_features:
+            raise ValueError("wrong number of weights")
+        model.weights = weights
+        model.bias = float(data["bias"])
+        return model
+
+
+class OneHotModel(LinearModel):
+    """Linear model on the 27 one-hot cell inputs, one weight per (cell, mark)"""
+    kind = "onehot"
+    n_features = 27
+    board_size = 9
+    symmetric = False
+
+    def features(self, board):
+        return onehot_features(board)
+
+    def batch_features(self, rows, board):
+        return batch_onehot(rows)
+
+    def evaluate(self, board, player):
+        # Sum the weight of each cell's mark instead of building the vector
+        w = self.weights
+        score = self.bias
+        for i, c in enumerate(board.cells):
+            score += w[3 * i + CELL_CODE[c]]
+        return score if player == 'X' else -score
+
+
+class MLPModel(Model):
+    """One tanh hidden layer on the 27 one-hot inputs, NumPy only.
+
+    Parameters are kept as lists until the first prediction, so loading a
+    saved model does not import NumPy.
+    """
+    kind = "mlp"
+    board_size = 9
+
+    def __init__(self, W1=None, b1=None, w2=None, b2=0.0):
+        self.W1, self.b1, self.w2, self.b2 = W1, b1, w2, b2
+        self._arrays = None
+
+    def features(self, board):
+        return onehot_features(board)
+
+    def batch_features(self, rows, board):
+        return batch_onehot(rows)
+
+    def predict(self, F):
+        import numpy as np
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.W1, dtype=np.float64),
+                            np.asarray(self.b1, dtype=np.float64),
+                            np.asarray(self.w2, dtype=np.float64))
+        W1, b1, w2 = self._arrays
+        return np.tanh(F @ W1 + b1) @ w2 + self.b2
+
+    def to_dict(self):
+        return {"W1": self.W1, "b1": self.b1, "w2": self.w2, "b2": self.b2}
+
+    @classmethod
+    def from_dict(cls, data):
+        W1 = [[float(v) for v in row] for row in data["W1"]]
+        b1 = [float(v) for v in data["b1"]]
+        w2 = [float(v) for v in data["w2"]]
+        if len(W1) != 27 or any(len(row) != len(b1) for row in W1) or len(w2) != len(b1):
+            raise ValueError("inconsistent layer sizes")
+        return cls(W1, b1, w2, float(data["b2"]))
+
+
+# Model kinds that trainer.py can build and the engine can evaluate with
+MODELS = {
+    "linear": LinearModel,
+    "onehot": OneHotModel,
+    "mlp": MLPModel,
+}
@@ -0,0 +1,155 @@
+# parallel.py
+# Root-parallel alphabeta: each root move is searched in a worker process.
+# Workers share the best score found so far and search later moves with
+# alpha just below it, so moves that cannot beat it are cut off early.
+#
+# A library and benchmark helper (benchmark.py's root_5x5_parallel) for
+# searching large positions: the GUI and the arena search serially, since
+# 3x3 searches are shorter than the process round trip and the arena
+# already plays one game per worker process.
+import atexit
+import math
+import os
+import time
+from board import make_board
+from alphabeta import alphabeta, SearchStats, SearchCancelled
+from ordering import MoveOrderer, static_rank
+from transposition import TranspositionTable
+
+_pool = None
+_shared = None         # (generation, best) multiprocessing.Values shared with the workers
+_worker_shared = None  # The same Values as seen from inside a worker
+
+
+def _init_worker(shared):
+    global _worker_shared
+    _worker_shared = shared
+
+
+class _Superseded:
+    """Cancel flag for a worker task: set once a newer search has started.
+
+    Tasks of a cancelled search can still be running when the next search
+    begins; they stop at their next node instead of racing it for the bound.
+    """
+    def __init__(self, generation, current):
+        self.generation = generation
+        self.current = current
+
+    def is_set(self):
+        return self.current.value != self.generation
+
+
+def _search_root_move(cells, n, k, move, player, depth, eval_fn, generation, symmetric):
+    gen, best = _worker_shared
+    if gen.value != generation:
+        return None  # Queued by a search that has since been cancelled
+    board = make_board(cells, n, k)
+    board.make_move(move, player)
+    bound = best.value
+    # Just below the best so far: moves that tie it still get an exact score
+    alpha = math.nextafter(bound, -math.inf) if bound > -math.inf else -9999
+    stats = SearchStats()
+    stats.cancel = _Superseded(generation, gen)
+    start = time.perf_counter()
+    try:
+        score = alphabeta(board, depth, alpha, 9999, False, player, eval_fn,
+                          TranspositionTable(symmetric=symmetric), MoveOrderer(), stats, 1)
+    except SearchCancelled:
+        return None
+    elapsed = time.perf_counter() - start
+    with best.get_lock():
+        # Only the search that submitted this task may raise its bound
+        if gen.value == generation and score > best.value:
+            best.value = score
+    counters = {"nodes": stats.nodes, "leaf_evals": stats.leaf_evals,
+                "cutoffs": stats.cutoffs, "max_depth": stats.max_depth, "elapsed": elapsed}
+    return move, score, score > alpha, counters
+
+
+def get_pool(workers=None):
+    """Process pool reused across turns, created on first use"""
+    global _pool, _shared
+    if _pool is None:
+        # Imported here to keep multiprocessing off the app's startup path
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        _shared = (multiprocessing.Value('q', 0, lock=False),
+                   multiprocessing.Value('d', -math.inf))
+        _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                    initializer=_init_worker, initargs=(_shared,))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+atexit.register(shutdown_pool)
+
+
+def _new_generation():
+    # Writes happen under the bound's lock so a worker never raises the
+    # bound of a search that has already been superseded
+    gen, best = _shared
+    with best.get_lock():
+        gen.value += 1
+        best.value = -math.inf
+    return gen.value
+
+
+def parallel_root_search(cells, player, depth, eval_fn, stats=None, report=None, n=3, k=3,
+                         symmetric=True):
+    """Score every root move in the pool.
+
+    eval_fn must be picklable (a module-level function or a model's bound
+    method). Returns [(move, score, exact)] in board order; scores of moves
+    that cannot beat the best are upper bounds (exact=False). The best
+    moves and best score are the same as a serial full-window search.
+    Worker counters and per-move timings are added to stats, stats.cancel aborts the search
+    and report(move, score, exact) is called as each move finishes. n and k select
+    the board variant; symmetric=False is for an eval_fn that is not
+    symmetric (see TranspositionTable).
+
+    Each call is a new generation of the shared bound: tasks left over from
+    a cancelled call neither read nor write it, and are drained before the
+    call returns so the pool is idle for the next one.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    cancel = stats.cancel if stats is not None else None
+    pool = get_pool()
+    generation = _new_generation()
+    moves = make_board(cells, n, k).legal_moves()
+    rank = static_rank(n)
+    # Likely-best moves first so the shared bound tightens early
+    pending = {pool.submit(_search_root_move, cells, n, k, m, player, depth, eval_fn, generation,
+                           symmetric)
+               for m in sorted(moves, key=lambda m: -rank[m])}
+    results = []
+    try:
+        while pending:
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for f in done:
+                result = f.result()
+                if result is None:
+                    continue  # Superseded by another search
+                move, score, exact, counters = result
+                results.append((move, score, exact))
+                if stats is not None:
+                    stats.merge(counters)
+                    stats.record_root_move(move, counters["nodes"], counters["elapsed"])
+                if report is not None:
+                    report(move, score, exact)
+    finally:
+        if pending:
+            # Supersede the running tasks so they stop at their next node,
+            # drop the queued ones and wait for the pool to go idle
+            _new_generation()
+            for f in pending:
+                f.cancel()
+            wait(pending)
+    return sorted(results)
@@ -0,0 +1,127 @@
+# selfplay.py
+# Generates ML training data by self-play across a process pool. Every
+# position reached is stored once per symmetry class with the six
+# extract_features features and its game-theoretic label from X's point
+# of view (1 X wins, 0 draw, -1 O wins with best play).
+#
+#   python selfplay.py --games 20000 --out selfplay.npy
+#   python selfplay.py --games 5000 --epsilon 1.0 --out random.csv
+#   python selfplay.py --n 4 --k 3 --label-depth 6 --games 500 --out 4x4.npy
+#
+# 3x3 labels and greedy moves come from the solved table; larger boards
+# are labelled by alphabeta to --label-depth (unproven positions count as
+# draws). .npy output uses the layout trainer.py memory-maps: float32
+# rows of features then label.
+import argparse
+import csv
+import os
+import random
+import time
+from board import make_board
+from alphabeta import search_root
+from heuristic import classical_eval
+from ml_model import extract_features
+from ordering import MoveOrderer
+from solver import get_solved_table
+from transposition import TranspositionTable
+from trainer import FEATURES
+
+GAMES_PER_JOB = 500
+
+_tt = None  # Per-process table for alphabeta labelling on larger boards
+
+
+def analyse(board, mover, label_depth):
+    """(value from mover's view as 1/0/-1, best moves) for a non-terminal position"""
+    global _tt
+    if board.n == 3 and board.k == 3:
+        score, best = get_solved_table().lookup(board.cells)
+    else:
+        if _tt is None:
+            _tt = TranspositionTable(max_size=1_000_000)
+        scores = search_root(board, mover, label_depth, classical_eval, tt=_tt,
+                             order=MoveOrderer())
+        score = max(s for _, s, _ in scores)
+        best = [m for m, s, _ in scores if s == score]
+    return (1 if score >= 1000 else -1 if score <= -1000 else 0), best
+
+
+def play_games(job):
+    """Play a batch of games; returns {canonical key: features + [label]}"""
+    seed, games, epsilon, n, k, label_depth = job
+    rng = random.Random(seed)
+    rows = {}
+    for _ in range(games):
+        board = make_board(None, n, k)
+        mover = 'X'
+        while True:
+            w = board.winner()
+            if w is not None:
+                label, best = (1 if w == 'X' else -1 if w == 'O' else 0), ()
+            else:
+                value, best = analyse(board, mover, label_depth)
+                label = value if mover == 'X' else -value
+            if board.count['X']:
+                key = board.key()
+                if key not in rows:
+                    rows[key] = extract_features(board) + [label]
+            if w is not None:
+                break
+            # Epsilon-greedy: a random move, otherwise one of the best
+            moves = board.legal_moves() if rng.random() < epsilon else best
+            board.make_move(rng.choice(moves), mover)
+            mover = 'O' if mover == 'X' else 'X'
+    return rows
+
+
+def generate(games, epsilon=0.3, n=3, k=3, label_depth=9, workers=None, seed=0):
+    """Rows for every distinct position reached in `games` self-play games"""
+    from concurrent.futures import ProcessPoolExecutor
+    if n == 3 and k == 3:
+        get_solved_table()  # Solve once here rather than in every worker
+    jobs = [(seed + i, min(GAMES_PER_JOB, games - start), epsilon, n, k, label_depth)
+            for i, start in enumerate(range(0, games, GAMES_PER_JOB))]
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(play_games, jobs):
+            for key, row in part.items():
+                rows.setdefault(key, row)
+    return list(rows.values())
+
+
+def write_rows(rows, path):
+    """Write .npy (float32, features then label) or CSV with the dataset's header"""
+    if path.endswith(".npy"):
+        import numpy as np
+        np.save(path, np.array(rows, dtype=np.float32).reshape(-1, len(FEATURES) + 1))
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(FEATURES + ["label"])
+            writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate training data by self-play")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--epsilon", type=float, default=0.3,
+                        help="chance of a random move instead of a best one (1 = random play)")
+    parser.add_argument("--n", type=int, default=3, help="board size")
+    parser.add_argument("--k", type=int, default=3, help="marks in a row to win")
+    parser.add_argument("--label-depth", type=int, default=9,
+                        help="alphabeta depth for labels on boards other than 3x3")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="selfplay.npy", help=".npy or .csv output file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = generate(args.games, args.epsilon, args.n, args.k, args.label_depth,
+                    args.workers, args.seed)
+    write_rows(rows, args.out)
+    print(f"{len(rows)} distinct positions from {args.games} games in "
+          f"{time.perf_counter() - start:.2f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
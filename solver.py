@@ -0,0 +1,133 @@
+# solver.py
+# Solves every reachable 3x3 position once and stores the result in a
+# compact binary table so perfect play becomes a single lookup.
+import os
+import sys
+from array import array
+from board import BitBoard
+from alphabeta import alphabeta
+from heuristic import classical_eval
+from transposition import TranspositionTable
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_PATH = os.path.join(SCRIPT_DIR, "solved_table.bin")
+
+MAGIC = b"TTT1"
+N_POSITIONS = 3 ** 9  # Index = base-3 board code, '-'=0, 'X'=1, 'O'=2
+SEARCH_DEPTH = 9      # Same depth Hard difficulty uses for every root move
+
+POW3 = [3 ** i for i in range(9)]
+
+
+def position_index(cells):
+    idx = 0
+    for i, c in enumerate(cells):
+        if c == 'X':
+            idx += POW3[i]
+        elif c == 'O':
+            idx += 2 * POW3[i]
+    return idx
+
+
+class SolvedTable:
+    """Per-position best search score and best-move bitmask for the side to move"""
+
+    def __init__(self, values, best_masks):
+        self.values = values          # array('h'), score from the mover's view
+        self.best_masks = best_masks  # array('H'), bit i set if cell i is optimal
+
+    def lookup(self, cells):
+        """Return (score, best_moves) or None for terminal/unreachable positions"""
+        idx = position_index(cells)
+        mask = self.best_masks[idx]
+        if not mask:
+            return None
+        return self.values[idx], [i for i in range(9) if mask >> i & 1]
+
+    def save(self, path=TABLE_PATH):
+        values, masks = array('h', self.values), array('H', self.best_masks)
+        if sys.byteorder != "little":
+            values.byteswap()
+            masks.byteswap()
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            values.tofile(f)
+            masks.tofile(f)
+
+    @classmethod
+    def load(cls, path=TABLE_PATH):
+        values, masks = array('h'), array('H')
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a solved table")
+            values.fromfile(f, N_POSITIONS)
+            masks.fromfile(f, N_POSITIONS)
+        if sys.byteorder != "little":
+            values.byteswap()
+            masks.byteswap()
+        return cls(values, masks)
+
+
+def solve():
+    """Walk every reachable position and record its optimal moves"""
+    values = array('h', [0] * N_POSITIONS)
+    masks = array('H', [0] * N_POSITIONS)
+    # One table per side to move, reused for the whole solve
+    tables = {'X': TranspositionTable(max_size=1_000_000),
+              'O': TranspositionTable(max_size=1_000_000)}
+    seen = set()
+
+    def visit(board, mover):
+        cells = board.cells
+        idx = position_index(cells)
+        if idx in seen:
+            return
+        seen.add(idx)
+        if board.winner() is not None:
+            return
+
+        scores = []
+        for m in board.legal_moves():
+            board.make_move(m, mover)
+            s = alphabeta(board, SEARCH_DEPTH, -9999, 9999, False, mover,
+                          classical_eval, tables[mover])
+            board.undo_move(m)
+            scores.append((m, s))
+        best = max(s for _, s in scores)
+        values[idx] = best
+        masks[idx] = sum(1 << m for m, s in scores if s == best)
+
+        nxt = 'O' if mover == 'X' else 'X'
+        for m, _ in scores:
+            board.make_move(m, mover)
+            visit(board, nxt)
+            board.undo_move(m)
+
+    visit(BitBoard(), 'X')
+    return SolvedTable(values, masks), len(seen)
+
+
+_table = None
+
+def get_solved_table(path=TABLE_PATH):
+    """Load the table from disk, generating and caching it on first use"""
+    global _table
+    if _table is None:
+        try:
+            _table = SolvedTable.load(path)
+        except (OSError, ValueError, EOFError):
+            _table, _ = solve()
+            try:
+                _table.save(path)
+            except OSError:
+                pass
+    return _table
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    table, n = solve()
+    table.save()
+    print(f"Solved {n} positions in {time.perf_counter() - start:.2f}s")
+    print(f"Wrote {TABLE_PATH} ({os.path.getsize(TABLE_PATH)} bytes)")
@@ -1,2 +0,0 @@
-import pandas as pd
-df =  pd.read_csv()
\ No newline at end of file
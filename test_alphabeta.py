@@ -0,0 +1,176 @@
+# test_alphabeta.py
+import pytest
+
+from alphabeta import (alphabeta, iterative_deepening, search_root, rescore_exact,
+                       SearchStats, SearchCancelled, SearchTimeout)
+from benchmark import copying_alphabeta
+from board import Board, BitBoard, make_board
+from conftest import assert_same_best, full_window, random_positions
+from heuristic import classical_eval
+from ordering import ORDERINGS, MoveOrderer
+from transposition import TranspositionTable
+
+
+@pytest.mark.parametrize("n,k,depth", [(3, 3, 9), (3, 3, 2), (4, 3, 3)])
+def test_make_unmake_matches_copying_search(n, k, depth):
+    for cells, player in random_positions(n, k, 15, seed=depth):
+        board = make_board(cells, n, k)
+        for m in board.legal_moves():
+            board.make_move(m, player)
+            before = board.copy()
+            expected = copying_alphabeta(before, depth, -9999, 9999, False, player, classical_eval)
+            assert alphabeta(board, depth, -9999, 9999, False, player, classical_eval) == expected
+            # The search leaves the board exactly as it found it
+            assert board.cells == before.cells
+            assert board.winner() == before.winner()
+            assert board.code == before.code
+            board.undo_move(m)
+
+
+@pytest.mark.parametrize("name", sorted(ORDERINGS))
+def test_move_ordering_keeps_values(name):
+    make_order = ORDERINGS[name]
+    for cells, player in random_positions(4, 3, 8, seed=5):
+        board = make_board(cells, 4, 3)
+        order = make_order() if make_order else None
+        for m in board.legal_moves():
+            board.make_move(m, player)
+            plain = alphabeta(board, 3, -9999, 9999, False, player, classical_eval)
+            assert alphabeta(board, 3, -9999, 9999, False, player, classical_eval,
+                             order=order) == plain
+            board.undo_move(m)
+
+
+def test_ordering_reduces_nodes():
+    unordered = SearchStats()
+    ordered = SearchStats()
+    for cells, player in random_positions(3, 3, 10, seed=6):
+        board = make_board(cells, 3, 3)
+        order = MoveOrderer()
+        for m in board.legal_moves():
+            board.make_move(m, player)
+            alphabeta(board, 9, -9999, 9999, False, player, classical_eval, stats=unordered)
+            alphabeta(board, 9, -9999, 9999, False, player, classical_eval, order=order,
+                      stats=ordered)
+            board.undo_move(m)
+    assert ordered.nodes < unordered.nodes
+
+
+def test_killers_keep_the_two_latest_moves():
+    order = MoveOrderer()
+    for move in (1, 2, 3):
+        order.record_cutoff(move, 2, 3)
+    assert order.killers[2] == [3, 2]
+    order.record_cutoff(3, 2, 2)
+    assert order.killers[2] == [3, 2]
+    assert order.history == {1: 9, 2: 9, 3: 13}
+    board = make_board(None, 3, 3)
+    assert order.order(board, [0, 1, 2, 3, 4], 2, 'X')[:2] == [3, 2]
+
+
+class CancelAfter:
+    """Cancel flag that trips after `calls` checks, i.e. part-way through a search"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def is_set(self):
+        self.calls -= 1
+        return self.calls < 0
+
+
+def test_cancel_aborts_and_restores_board():
+    board = make_board(list("X---O----"), 3, 3)
+    stats = SearchStats()
+    stats.cancel = CancelAfter(500)
+    with pytest.raises(SearchCancelled):
+        search_root(board, 'X', 9, classical_eval, stats=stats)
+    assert stats.max_depth > 2
+    assert board.cells == list("X---O----")
+    assert board.code == make_board(list("X---O----"), 3, 3).code
+
+
+def test_iterative_deepening_matches_fixed_depth():
+    for cells, player in random_positions(3, 3, 20, seed=3):
+        board = BitBoard(cells)
+        for max_depth in (1, 3):
+            scores, depth = iterative_deepening(board, player, classical_eval, 60_000,
+                                                max_depth=max_depth)
+            assert depth <= max_depth
+            assert_same_best(scores, full_window(board, player, depth))
+            assert board.cells == cells
+
+
+def test_iterative_deepening_timeout_restores_board():
+    board = Board(n=5, k=4)
+    stats = SearchStats()
+    scores, depth = iterative_deepening(board, 'X', classical_eval, 1, max_depth=8,
+                                        stats=stats)
+    assert scores is not None and depth < 8
+    assert board.cells == ['-'] * 25
+    assert board.empty == 25 and board.winner() is None
+    assert board.counts('X') == board.counts('O') == (0, 0, 0, 0, 0)
+    # A timed-out search leaves no deadline behind
+    assert stats.deadline is None
+    # The clock is checked every 256 nodes, so this times out deep in the tree
+    stats = SearchStats()
+    stats.deadline = 0
+    with pytest.raises(SearchTimeout):
+        alphabeta(board, 6, -9999, 9999, True, 'X', classical_eval, stats=stats)
+    assert stats.max_depth > 1
+    assert board.cells == ['-'] * 25 and board.code == 0
+
+
+@pytest.mark.parametrize("n,k,depth", [(3, 3, 4), (4, 3, 3)])
+def test_stats_count_nodes_leaves_and_root_moves(n, k, depth):
+    for cells, player in random_positions(n, k, 5, seed=7):
+        board = make_board(cells, n, k)
+        evals = []
+        def counting_eval(b, p):
+            evals.append(1)
+            return classical_eval(b, p)
+        stats = SearchStats()
+        scores = search_root(board, player, depth - 1, counting_eval, stats=stats)
+        assert stats.leaf_evals == len(evals)
+        assert stats.nodes >= stats.leaf_evals + len(scores) - 1
+        assert 1 <= stats.max_depth <= depth
+        # Every node is attributed to the root move it was searched under
+        assert set(stats.root_moves) == {m for m, _, _ in scores}
+        assert sum(e["nodes"] for e in stats.root_moves.values()) == stats.nodes
+        assert all(e["ms"] >= 0 for e in stats.root_moves.values())
+
+
+def test_stats_merge_and_as_dict():
+    stats = SearchStats()
+    stats.record_root_move(4, 10, 0.002)
+    stats.record_root_move(4, 5, 0.001)
+    stats.merge({"nodes": 7, "leaf_evals": 3, "cutoffs": 2, "max_depth": 5})
+    stats.merge({"nodes": 1, "leaf_evals": 1, "cutoffs": 0, "max_depth": 2})
+    d = stats.as_dict()
+    assert (d["nodes"], d["leaf_evals"], d["cutoffs"], d["max_depth"]) == (8, 4, 2, 5)
+    assert d["root_moves"] == {"4": {"nodes": 15, "ms": 3.0}}
+
+
+@pytest.mark.parametrize("n,k,depth", [(3, 3, 9), (3, 3, 2), (4, 3, 3)])
+def test_search_root_matches_full_window(n, k, depth):
+    for cells, player in random_positions(n, k, 20, seed=depth):
+        board = make_board(cells, n, k)
+        exact = full_window(board, player, depth)
+        scores = search_root(board, player, depth, classical_eval, tt=TranspositionTable(),
+                             order=MoveOrderer())
+        assert_same_best(scores, exact)
+        assert rescore_exact(board, player, depth, classical_eval, scores) == \
+            [(m, exact[m], True) for m, _, _ in scores]
+
+
+def test_report_streams_each_score_with_its_exactness():
+    for cells, player in random_positions(4, 3, 10, seed=11):
+        board = make_board(cells, 4, 3)
+        reported = []
+        scores = search_root(board, player, 2, classical_eval, report=lambda *r: reported.append(r))
+        assert reported == scores
+        reported.clear()
+        scores, _ = iterative_deepening(board, player, classical_eval, 10_000, 2,
+                                        report=lambda *r: reported.append(r))
+        # The last pass's reports are the returned scores
+        assert reported[-len(scores):] == scores
@@ -0,0 +1,40 @@
+# test_arena.py
+import argparse
+
+import pytest
+
+import arena
+
+
+def test_parse_player():
+    assert arena.parse_player("random") == "random"
+    assert arena.parse_player("Hard") == ("Hard", "Classical")
+    assert arena.parse_player("Normal:MCTS") == ("Normal", "MCTS")
+    for spec in ("Impossible", "Hard:Guess"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            arena.parse_player(spec)
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert arena.percentile(values, 50) == 51
+    assert arena.percentile(values, 99) == 100
+    assert arena.percentile([], 50) == 0.0
+
+
+@pytest.mark.parametrize("n,k", [(3, 3), (4, 3)])
+def test_play_game(n, k):
+    for a_is_x in (True, False):
+        result, lat_a, lat_b = arena.play_game((1, ("Easy", "Classical"), "random", a_is_x, n, k))
+        assert result in ("win", "draw", "loss")
+        # X moves first, so X has made as many moves as O or one more
+        x, o = (lat_a, lat_b) if a_is_x else (lat_b, lat_a)
+        assert len(x) - len(o) in (0, 1)
+        assert all(t >= 0 for t in lat_a + lat_b)
+
+
+def test_hard_never_loses_to_random(capsys):
+    counts = arena.run(6, arena.parse_player("Hard"), "random", workers=1)
+    assert sum(counts.values()) == 6
+    assert counts["loss"] == 0
+    assert "A win" in capsys.readouterr().out
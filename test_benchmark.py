@@ -0,0 +1,43 @@
+# test_benchmark.py
+import json
+import sys
+
+import pytest
+
+import benchmark
+
+
+def result(wall_s, nodes):
+    return {"wall_s": wall_s, "nodes": nodes, "nodes_per_s": 0, "peak_kb": 0.0}
+
+
+def test_compare_flags_slower_and_bigger_searches():
+    baseline = {"a": result(1.0, 100), "b": result(1.0, 100), "c": result(1.0, 100)}
+    results = {"a": result(1.1, 100), "b": result(1.3, 100), "c": result(1.0, 130)}
+    regressions = benchmark.compare(results, baseline, 0.2, {})
+    assert [line.split(":")[0] for line in regressions] == ["b.wall_s", "c.nodes"]
+
+
+def test_compare_uses_per_benchmark_thresholds_and_skips_missing():
+    baseline = {"a": result(1.0, 0), "b": {"skipped": "no numpy"}}
+    results = {"a": result(1.4, 0), "b": result(9.0, 0), "new": result(9.0, 0)}
+    assert benchmark.compare(results, baseline, 0.2, {"a": 0.5}) == []
+    assert len(benchmark.compare(results, baseline, 0.2, {})) == 1
+
+
+def test_run_suite_reports_nodes():
+    results = benchmark.run_suite(["alphabeta_d3", "classical_eval"])
+    assert set(results) == {"alphabeta_d3", "classical_eval"}
+    for r in results.values():
+        assert r["wall_s"] > 0 and r["nodes"] > 0 and r["nodes_per_s"] > 0
+
+
+def test_baseline_check_exits_non_zero_on_regression(tmp_path, monkeypatch, capsys):
+    # A baseline of zero-time runs makes any measured run a regression
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"classical_eval": result(1e-9, 1)}))
+    monkeypatch.setattr(sys, "argv", ["benchmark.py", "classical_eval", "--baseline", str(path)])
+    with pytest.raises(SystemExit) as exc:
+        benchmark.main()
+    assert exc.value.code == 1
+    assert "classical_eval.wall_s" in capsys.readouterr().out
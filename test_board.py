@@ -0,0 +1,136 @@
+# test_board.py
+import random
+
+import pytest
+
+from board import (Board, BitBoard, make_board, symmetries, win_lines, center_cells,
+                   corner_cells)
+from conftest import OTHER, random_positions
+
+VARIANTS = [(3, 3), (4, 3), (5, 4), (6, 4), (7, 5)]
+
+
+def test_bitboard_matches_board():
+    rng = random.Random(1)
+    for _ in range(200):
+        board, bits = Board(), BitBoard()
+        played = []
+        player = 'X'
+        while board.winner() is None:
+            assert list(bits.legal_moves()) == board.legal_moves()
+            m = rng.choice(board.legal_moves())
+            board.make_move(m, player)
+            bits.make_move(m, player)
+            played.append(m)
+            player = OTHER[player]
+            assert bits.cells == board.cells
+            assert bits.winner() == board.winner()
+            assert bits.is_terminal() == board.is_terminal()
+            assert bits.key() == board.key()
+            assert bits.code == board.code
+            assert [bits.counts(p) for p in "XO"] == [board.counts(p) for p in "XO"]
+        assert BitBoard(board.cells).counts('X') == bits.counts('X')
+        while played:
+            m = played.pop()
+            board.undo_move(m)
+            bits.undo_move(m)
+            assert bits.cells == board.cells
+            assert bits.winner() == board.winner()
+            assert [bits.counts(p) for p in "XO"] == [board.counts(p) for p in "XO"]
+
+
+def test_bitboard_copy_is_independent():
+    board = BitBoard(list("X---O----"))
+    copy = board.copy()
+    copy.make_move(8, 'X')
+    assert board.cells == list("X---O----")
+    assert copy.cells == list("X---O---X")
+    assert copy.code != board.code
+
+
+@pytest.mark.parametrize("n,k", VARIANTS)
+def test_incremental_winner_matches_scan(n, k):
+    rng = random.Random(n + k)
+    for _ in range(20):
+        board = Board(n=n, k=k)
+        played = []
+        player = 'X'
+        while board.winner() is None:
+            m = rng.choice(board.legal_moves())
+            board.make_move(m, player)
+            played.append(m)
+            player = OTHER[player]
+            scanned = board._scan_winner() or ('D' if '-' not in board.cells else None)
+            assert board.winner() == scanned
+        while played:
+            board.undo_move(played.pop())
+            assert board.winner() == board._scan_winner()
+
+
+def test_win_lines():
+    assert len(win_lines(3, 3)) == 8
+    assert len(win_lines(4, 3)) == 4 * 2 * 2 + 2 * 2 * 2
+    assert len(win_lines(7, 5)) == 7 * 3 * 2 + 3 * 3 * 2
+    assert all(len(line) == 4 for line in win_lines(6, 4))
+
+
+@pytest.mark.parametrize("n", [3, 4, 5])
+def test_key_is_the_same_for_symmetric_positions(n):
+    for cells, _ in random_positions(n, 3, 10, seed=n):
+        board = make_board(cells, n, 3)
+        key = board.key()
+        for perm in symmetries(n):
+            image = ['-'] * (n * n)
+            for i, c in enumerate(cells):
+                image[perm[i]] = c
+            assert make_board(image, n, 3).key() == key
+
+
+def test_make_board_picks_bitboard_for_3x3_only():
+    assert isinstance(make_board(None, 3, 3), BitBoard)
+    assert not isinstance(make_board(None, 4, 3), BitBoard)
+    assert make_board(None, 4, 3).k == 3
+
+
+def rescan(cells, n, k):
+    """Counters of Board/BitBoard computed from scratch"""
+    counts = {}
+    for p in "XO":
+        q = OTHER[p]
+        near = opn = 0
+        for line in win_lines(n, k):
+            mine = sum(cells[i] == p for i in line)
+            if any(cells[i] == q for i in line):
+                continue
+            if mine == k - 1:
+                near += 1
+            elif 1 <= mine <= k - 2:
+                opn += 1
+        counts[p] = (near, opn, cells.count(p),
+                     sum(cells[i] == p for i in center_cells(n)),
+                     sum(cells[i] == p for i in corner_cells(n)))
+    code = sum("-XO".index(c) * 3 ** i for i, c in enumerate(cells))
+    return counts, code
+
+
+@pytest.mark.parametrize("n,k", VARIANTS)
+def test_counters_match_rescan(n, k):
+    rng = random.Random(n * 10 + k)
+    board = Board(n=n, k=k)
+    played = []
+    player = 'X'
+    while board.winner() is None:
+        m = rng.choice(board.legal_moves())
+        board.make_move(m, player)
+        played.append(m)
+        player = OTHER[player]
+        counts, code = rescan(board.cells, n, k)
+        assert {p: board.counts(p) for p in "XO"} == counts
+        assert board.code == code
+        assert board.near[player] == counts[player][0]
+    # Undo restores every counter, not only the cells
+    while played:
+        board.undo_move(played.pop())
+        counts, code = rescan(board.cells, n, k)
+        assert {p: board.counts(p) for p in "XO"} == counts
+        assert board.code == code
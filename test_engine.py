@@ -0,0 +1,155 @@
+# test_engine.py
+import json
+import random
+import threading
+
+import pytest
+
+from alphabeta import SearchCancelled, SearchStats
+from board import make_board
+import engine as engine_module
+from engine import DIFFICULTY, Engine
+from heuristic import classical_eval
+from solver import get_solved_table
+from conftest import OTHER, random_model, random_positions
+
+VARIANTS = [(3, 3), (4, 3), (5, 4)]
+
+
+@pytest.fixture
+def no_mistakes(monkeypatch):
+    """Normal without random moves or noise, so its choice is deterministic"""
+    monkeypatch.setitem(DIFFICULTY, "Normal",
+                        dict(DIFFICULTY["Normal"], mistake=0.0, noise=0.0))
+
+
+def engine_for(eval_mode, difficulty="Easy", k=None):
+    kind = {"ML": "linear", "One-hot": "onehot", "MLP": "mlp"}.get(eval_mode)
+    model = random_model(kind) if kind else None
+    return Engine(difficulty, eval_mode, model, k=k)
+
+
+@pytest.mark.parametrize("n,k", VARIANTS)
+@pytest.mark.parametrize("eval_mode", ["Classical", "ML", "One-hot", "MLP", "MCTS"])
+def test_games_are_played_to_the_end_on_any_size(n, k, eval_mode):
+    random.seed(n + k)
+    engines = {'X': engine_for(eval_mode, k=k), 'O': engine_for("Classical", k=k)}
+    board = make_board(None, n, k)
+    player = 'X'
+    while board.winner() is None:
+        move, log = engines[player].choose_move(list(board.cells), player)
+        assert move in board.legal_moves()
+        assert log
+        board.make_move(move, player)
+        player = OTHER[player]
+
+
+# (n, k, mover's cells, opponent's cells, the winning cell)
+THREATS = [(3, 3, [0, 1], [4, 8], 2),
+           (4, 3, [0, 1], [12, 15], 2),
+           (5, 4, [0, 1, 2], [20, 22, 24], 3)]
+
+
+@pytest.mark.parametrize("n,k,mine,theirs,win", THREATS)
+def test_takes_the_win_and_blocks(n, k, mine, theirs, win, no_mistakes):
+    engine = Engine("Normal", k=k)
+    for mover in "XO":
+        cells = ['-'] * (n * n)
+        for i in mine:
+            cells[i] = mover
+        for i in theirs:
+            cells[i] = OTHER[mover]
+        assert engine.choose_move(cells, mover)[0] == win
+        # The opponent, to move, must block the same cell
+        assert engine.choose_move(cells, OTHER[mover])[0] == win
+
+
+def test_hard_plays_the_solved_moves():
+    random.seed(0)
+    engine = Engine("Hard")
+    for cells, player in random_positions(3, 3, 20, seed=3):
+        if cells.count('-') == 9:
+            continue
+        _, best_moves = get_solved_table().lookup(cells)
+        assert engine.choose_move(cells, player)[0] in best_moves
+
+
+def test_one_hot_models_fall_back_to_classical_on_other_sizes():
+    engine = Engine("Normal", "One-hot", random_model("onehot"))
+    assert engine.uses_model(['-'] * 9)
+    assert not engine.uses_model(['-'] * 16)
+    assert engine.base_eval(['-'] * 16) is classical_eval
+    # The aggregate features fit every size
+    assert Engine("Normal", "ML", random_model("linear")).uses_model(['-'] * 16)
+
+
+@pytest.mark.parametrize("eval_mode", ["ML", "One-hot", "MLP"])
+def test_transposition_table_follows_the_model_symmetry(eval_mode):
+    engine = engine_for(eval_mode)
+    assert engine.tt.symmetric == engine.model.symmetric
+    assert Engine("Normal").tt.symmetric
+
+
+def test_tables_are_for_3x3_only():
+    assert Engine("Normal").uses_table(['-'] * 9)
+    assert not Engine("Normal").uses_table(['-'] * 16)
+    assert not Engine("Normal", k=4).uses_table(['-'] * 16)
+
+
+def test_cells_must_form_a_square_board():
+    with pytest.raises(ValueError):
+        Engine("Normal").choose_move(['-'] * 10, 'X')
+
+
+def test_cancel_aborts_the_search(no_mistakes):
+    stats = SearchStats()
+    stats.cancel = threading.Event()
+    stats.cancel.set()
+    with pytest.raises(SearchCancelled):
+        Engine("Normal").choose_move(list("X---O----"), 'X', stats=stats)
+
+
+def test_reports_root_scores_and_writes_a_trace(tmp_path, no_mistakes):
+    path = tmp_path / "trace.jsonl"
+    engine = Engine("Normal", trace_path=str(path), k=3)
+    reported = []
+    cells = ['-'] * 16
+    cells[5] = 'X'
+    move, _ = engine.choose_move(cells, 'O', report=lambda m, s, exact: reported.append(m))
+    assert move in reported
+    assert set(reported) <= set(i for i, c in enumerate(cells) if c == '-')
+    record = json.loads(path.read_text().splitlines()[-1])
+    assert record["move"] == move and record["board"] == "".join(cells)
+    assert record["nodes"] > 0
+
+
+def test_noisy_levels_start_each_turn_with_an_empty_table(monkeypatch):
+    monkeypatch.setitem(DIFFICULTY, "Normal", dict(DIFFICULTY["Normal"], mistake=0.0))
+    engine = Engine("Normal", k=3)
+    cells = ['-'] * 16
+    cells[5] = 'X'
+    engine.tt.store("stale", "exact", 0.0)
+    engine.choose_move(cells, 'O')
+    assert len(engine.tt) > 0 and engine.tt.get("stale") is None
+
+
+@pytest.mark.parametrize("difficulty", ["Easy", "Normal", "Hard"])
+def test_only_noise_free_levels_ponder_into_the_table(difficulty, monkeypatch):
+    monkeypatch.setattr(engine_module, "PONDER_MS", 300)
+    monkeypatch.setitem(DIFFICULTY, "Hard", dict(DIFFICULTY["Hard"], budget_ms=50))
+    engine = Engine(difficulty, k=3)
+    cells = ['-'] * 16
+    cells[5] = 'X'
+    engine.ponder(cells, 'O', threading.Event())
+    assert (len(engine.tt) > 0) == (DIFFICULTY[difficulty]["noise"] == 0)
+
+
+@pytest.mark.parametrize("eval_mode", ["Classical", "MCTS"])
+def test_ponder_returns_on_cancel(eval_mode):
+    engine = Engine("Hard", eval_mode, k=3)
+    cancel = threading.Event()
+    cancel.set()
+    cells = ['-'] * 16
+    cells[5] = 'X'
+    engine.ponder(cells, 'O', cancel)
+    assert len(engine.tt) == 0
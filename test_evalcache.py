@@ -0,0 +1,97 @@
+# test_evalcache.py
+import random
+
+import pytest
+
+from board import Board
+from engine import Engine
+from evalcache import EVAL_CACHE, EvalCache
+from heuristic import classical_eval
+from conftest import random_model, random_positions
+
+
+def counting(eval_fn):
+    calls = []
+    def counted(board, player):
+        calls.append(board.raw_key())
+        return eval_fn(board, player)
+    return counted, calls
+
+
+def test_hits_return_the_cached_value():
+    cache = EvalCache()
+    fn, calls = counting(classical_eval)
+    cached = cache.wrap(fn, "classical")
+    positions = random_positions(4, 3, 20, seed=1)
+    for _ in range(2):
+        for cells, player in positions:
+            board = Board(cells, n=4, k=3)
+            assert cached(board, player) == classical_eval(board, player)
+    distinct = len({(tuple(c), p) for c, p in positions})
+    assert len(calls) == len(cache) == cache.misses == distinct
+    assert cache.hits == 2 * len(positions) - distinct
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EvalCache(max_size=2)
+    fn, calls = counting(classical_eval)
+    cached = cache.wrap(fn, "classical")
+    a, b, c = (Board(list(cells)) for cells in ("X--------", "-X-------", "--X------"))
+    cached(a, 'O')
+    cached(b, 'O')
+    cached(a, 'O')          # a is now the most recent
+    cached(c, 'O')          # evicts b
+    assert cache.evictions == 1
+    cached(a, 'O')
+    assert len(calls) == 3
+    cached(b, 'O')
+    assert len(calls) == 4
+
+
+def test_invalidate_drops_matching_evaluators_only():
+    cache = EvalCache()
+    board = Board(list("X---O----"))
+    for name in ("ML linear:1", "ML mlp:2", "classical"):
+        cache.wrap(classical_eval, name)(board, 'X')
+    cache.invalidate("ML")
+    assert [key[2] for key in cache.entries] == ["classical"]
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_batches_only_evaluate_missing_rows():
+    pytest.importorskip("numpy")
+    model = random_model("linear")
+    cache = EvalCache()
+    single = cache.wrap(model.evaluate, "ML")
+    seen = []
+    def batch_fn(rows, player, board):
+        seen.extend(rows)
+        return model.evaluate_batch(rows, player, board)
+    batch = cache.wrap_batch(batch_fn, "ML")
+    geometry = Board(n=4, k=3)
+    rows = [cells for cells, _ in random_positions(4, 3, 10, seed=2)]
+    single(Board(rows[0], n=4, k=3), 'X')         # Shared with the batch
+    values = batch(rows, 'X', geometry)
+    assert values == pytest.approx([model.evaluate(Board(r, n=4, k=3), 'X') for r in rows])
+    assert len(seen) == len({tuple(r) for r in rows[1:]})
+    assert batch(rows, 'X', geometry) == values
+    assert len(seen) == len({tuple(r) for r in rows[1:]})
+
+
+def test_noise_is_added_after_the_lookup():
+    pytest.importorskip("numpy")
+    random.seed(0)
+    model = random_model("linear", seed=3)
+    engine = Engine("Easy", "ML", model, k=3)
+    cells = ['-'] * 16
+    cells[5] = 'X'
+    board = Board(cells, n=4, k=3)
+    eval_fn, batch_eval = engine.eval_fns(cells)
+    noisy = {eval_fn(board, 'O') for _ in range(5)}
+    assert len(noisy) == 5
+    # The cache holds the noise-free value, so every call draws fresh noise
+    assert EVAL_CACHE.entries[(board.raw_key(), 'O', "ML " + model.fingerprint())] == \
+        pytest.approx(model.evaluate(board, 'O'))
+    assert all(abs(v - model.evaluate(board, 'O')) <= 5.0 for v in noisy)
+    assert batch_eval is not None
@@ -0,0 +1,57 @@
+# test_evaltable.py
+from array import array
+
+import pytest
+
+import evaltable
+from board import BitBoard
+from evaltable import (EvalTable, N_CODES, all_cells, build_model, classical_table,
+                       write_table)
+from heuristic import classical_eval
+from ml_model import MODELS
+from conftest import random_model, random_positions
+
+
+def test_classical_table_matches_eval():
+    table = classical_table()
+    if table is None:
+        pytest.skip("read-only install")
+    for cells in all_cells()[::7]:
+        board = BitBoard(cells)
+        for p in "XO":
+            assert table.evaluate(board, p) == classical_eval(board, p)
+
+
+@pytest.mark.parametrize("kind", sorted(MODELS))
+def test_model_table_matches_evaluate(kind, tmp_path):
+    pytest.importorskip("numpy")
+    model = random_model(kind, seed=1)
+    positions = random_positions(3, 3, 50, seed=7)
+    path = str(tmp_path / f"eval_table_{kind}.bin")
+    write_table(path, build_model(model), model.fingerprint())
+    table = EvalTable(path, model.fingerprint())
+    for cells, player in positions:
+        board = BitBoard(cells)
+        assert table.evaluate(board, player) == pytest.approx(model.evaluate(board, player))
+    with pytest.raises(ValueError):
+        EvalTable(path, "another-tag")
+
+
+def test_tables_are_built_once_and_rebuilt_when_stale(tmp_path, monkeypatch):
+    monkeypatch.setattr(evaltable, "SCRIPT_DIR", str(tmp_path))
+    builds = []
+    def build():
+        builds.append(1)
+        return array('i', range(2 * N_CODES))
+    table = evaltable.get_table("test", build, "v1")
+    assert evaltable.get_table("test", build, "v1") is table
+    assert len(builds) == 1 and table.evaluate(BitBoard(list("X--------")), 'O') == N_CODES + 1
+    # Another process finds the file and maps it without building
+    evaltable._tables.clear()
+    assert evaltable.get_table("test", build, "v1").tag == "v1" and len(builds) == 1
+    assert evaltable.get_table("test", build, "v2").tag == "v2" and len(builds) == 2
+
+
+def test_unwritable_directory_means_no_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(evaltable, "SCRIPT_DIR", str(tmp_path / "missing"))
+    assert evaltable.get_table("test", lambda: array('h', [0] * (2 * N_CODES)), "v1") is None
@@ -0,0 +1,67 @@
+# test_mcts.py
+import random
+import threading
+
+import pytest
+
+from alphabeta import SearchCancelled, SearchStats
+from heuristic import classical_eval
+from mcts import MCTS
+
+
+@pytest.mark.parametrize("cells,k,win", [("XX-OO----", None, 2),
+                                         ("XX--OO----------", 3, 2)])
+def test_finds_the_immediate_win(cells, k, win):
+    mcts = MCTS(rng=random.Random(0))
+    results = mcts.search(list(cells), 'X', iterations=3000, k=k)
+    assert mcts.best_move() == win
+    assert {m for m, _, _ in results} == {i for i, c in enumerate(cells) if c == '-'}
+    assert max(results, key=lambda r: r[2])[0] == win
+
+
+def test_visits_add_up_to_the_iterations():
+    mcts = MCTS(rng=random.Random(1))
+    results = mcts.search(['-'] * 9, 'X', iterations=500)
+    assert sum(v for _, v, _ in results) == mcts.root.visits == 500
+    assert all(0.0 <= rate <= 1.0 for _, _, rate in results)
+
+
+def test_subtree_of_the_moves_played_is_reused():
+    mcts = MCTS(rng=random.Random(2))
+    cells = list("X---O----")
+    mcts.search(cells, 'X', iterations=2000)
+    move = mcts.best_move()
+    reply = max(mcts.root.children[move].children.values(), key=lambda ch: ch.visits)
+    cells[move], cells[reply.move] = 'X', 'O'
+    mcts.set_root(cells, 'X')
+    assert mcts.root is reply and mcts.reused == reply.visits > 0
+    # A position that does not follow from the tree starts afresh
+    mcts.set_root(list("O---X----"), 'X')
+    assert mcts.reused == 0 and mcts.root.visits == 0
+
+
+def test_finished_games_have_no_moves():
+    mcts = MCTS()
+    assert mcts.search(list("XXXOO----"), 'O', iterations=10) == []
+
+
+def test_cancel_aborts_the_search():
+    stats = SearchStats()
+    stats.cancel = threading.Event()
+    stats.cancel.set()
+    with pytest.raises(SearchCancelled):
+        MCTS().search(['-'] * 9, 'X', iterations=100, stats=stats)
+
+
+def test_evaluation_cuts_playouts_off():
+    calls = []
+    def eval_fn(board, player):
+        calls.append(player)
+        return classical_eval(board, player)
+    stats = SearchStats()
+    mcts = MCTS(eval_fn=eval_fn, playout_depth=2, rng=random.Random(3))
+    mcts.search(['-'] * 25, 'X', iterations=200, stats=stats)
+    # Nothing ends within a few moves on 5x5, so every playout is cut off
+    assert len(calls) == 200 and set(calls) == {'X'}
+    assert stats.nodes == 2 * 200
+    assert stats.leaf_evals == 200
@@ -0,0 +1,78 @@
+# test_ml_model.py
+import pytest
+
+from alphabeta import search_root
+from board import BitBoard, make_board, symmetries
+from conftest import random_model, random_positions
+from ml_model import MODELS, batch_features, extract_features
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("kind", sorted(MODELS))
+def test_batch_matches_evaluate(kind):
+    model = random_model(kind, seed=1)
+    rows = [cells for cells, _ in random_positions(3, 3, 50, seed=7)]
+    for p in "XO":
+        batch = model.evaluate_batch(rows, p, BitBoard())
+        assert batch == pytest.approx([model.evaluate(BitBoard(c), p) for c in rows])
+
+
+@pytest.mark.parametrize("n,k", [(3, 3), (4, 3), (5, 4)])
+def test_batch_features_match_extract_features(n, k):
+    positions = random_positions(n, k, 30, seed=n)
+    rows = [cells for cells, _ in positions]
+    F = batch_features(rows, make_board(None, n, k))
+    assert F.tolist() == [extract_features(make_board(c, n, k)) for c in rows]
+
+
+def test_batched_horizon_matches_per_leaf_search():
+    model = random_model("linear", seed=2)
+    for cells, player in random_positions(4, 3, 10, seed=9):
+        board = make_board(cells, 4, 3)
+        plain = search_root(board, player, 2, model.evaluate)
+        batched = search_root(board, player, 2, model.evaluate, batch_eval=model.evaluate_batch)
+        assert [m for m, _, _ in batched] == [m for m, _, _ in plain]
+        assert [s for _, s, _ in batched] == pytest.approx([s for _, s, _ in plain])
+        assert board.cells == cells
+
+
+@pytest.mark.parametrize("kind", sorted(MODELS))
+def test_model_round_trip(kind, tmp_path):
+    model = random_model(kind)
+    path = tmp_path / f"{kind}.json"
+    model.save(path, key="data-1")
+    loaded = MODELS[kind].load(path, key="data-1")
+    assert loaded is not None
+    assert loaded.fingerprint() == model.fingerprint()
+    for cells, player in random_positions(3, 3, 30, seed=6):
+        board = BitBoard(cells)
+        assert loaded.evaluate(board, player) == pytest.approx(model.evaluate(board, player))
+    # Stale, foreign or corrupt artifacts are rejected rather than misread
+    assert MODELS[kind].load(path, key="data-2") is None
+    other = next(cls for name, cls in MODELS.items() if name != kind)
+    assert other.load(path, key="data-1") is None
+    path.write_text("{not json")
+    assert MODELS[kind].load(path) is None
+    assert MODELS[kind].load(tmp_path / "missing.json") is None
+
+
+def test_model_fingerprint_tracks_parameters():
+    model = random_model("linear")
+    before = model.fingerprint()
+    model.bias += 1
+    assert model.fingerprint() != before
+
+
+@pytest.mark.parametrize("kind", sorted(MODELS))
+def test_symmetric_flag_matches_the_scores(kind):
+    model = random_model(kind, seed=4)
+    differs = False
+    for cells, player in random_positions(3, 3, 20, seed=5):
+        value = model.evaluate(BitBoard(cells), player)
+        for perm in symmetries(3):
+            image = ['-'] * 9
+            for i, c in enumerate(cells):
+                image[perm[i]] = c
+            differs |= model.evaluate(BitBoard(image), player) != pytest.approx(value)
+    assert differs != model.symmetric
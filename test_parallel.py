@@ -0,0 +1,45 @@
+# test_parallel.py
+import pytest
+
+from alphabeta import SearchStats, SearchCancelled
+from board import BitBoard
+from conftest import assert_same_best, full_window, random_positions
+from heuristic import classical_eval
+
+parallel = pytest.importorskip("parallel")
+
+
+@pytest.fixture(autouse=True)
+def pool():
+    yield
+    parallel.shutdown_pool()
+
+
+def test_matches_serial():
+    cases = random_positions(3, 3, 5, seed=5) + [(['-'] * 9, 'X')]
+    for cells, player in cases:
+        exact = full_window(BitBoard(cells), player, 4)
+        reported = []
+        scores = parallel.parallel_root_search(cells, player, 4, classical_eval,
+                                               report=lambda *r: reported.append(r))
+        assert [m for m, _, _ in scores] == sorted(exact)
+        assert sorted(reported) == scores
+        assert_same_best(scores, exact)
+
+
+def test_search_after_cancelled_search():
+    class Cancel:
+        calls = 0
+
+        def is_set(self):
+            self.calls += 1
+            return self.calls > 1
+
+    stats = SearchStats()
+    stats.cancel = Cancel()
+    with pytest.raises(SearchCancelled):
+        parallel.parallel_root_search(['-'] * 16, 'X', 6, classical_eval, stats, n=4, k=3)
+    # Leftover tasks of the cancelled search must not touch this one's bound
+    cells = list("X---O----")
+    exact = full_window(BitBoard(cells), 'X', 6)
+    assert_same_best(parallel.parallel_root_search(cells, 'X', 6, classical_eval), exact)
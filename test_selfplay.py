@@ -0,0 +1,52 @@
+# test_selfplay.py
+import pytest
+
+import selfplay
+from board import make_board
+from conftest import full_window, random_positions
+from solver import get_solved_table
+
+
+def test_analyse_uses_the_solved_value():
+    for cells, player in random_positions(3, 3, 30, seed=4):
+        value, best = selfplay.analyse(make_board(cells, 3, 3), player, 9)
+        score, best_moves = get_solved_table().lookup(cells)
+        assert value == (score > 0) - (score < 0)
+        assert best == best_moves
+
+
+def test_analyse_searches_larger_boards():
+    for cells, player in random_positions(4, 3, 10, seed=5):
+        board = make_board(cells, 4, 3)
+        value, best = selfplay.analyse(board, player, 3)
+        exact = full_window(board, player, 3)
+        top = max(exact.values())
+        assert set(best) == {m for m, s in exact.items() if s == top}
+        assert value == (1 if top >= 1000 else -1 if top <= -1000 else 0)
+
+
+def test_best_play_is_a_draw_throughout():
+    rows = selfplay.play_games((0, 20, 0.0, 3, 3, 9))
+    assert rows and all(row[-1] == 0 for row in rows.values())
+
+
+def test_rows_are_distinct_positions_with_valid_labels():
+    rows = selfplay.play_games((1, 50, 1.0, 4, 3, 2))
+    assert len(set(rows)) == len(rows)
+    for row in rows.values():
+        x, o = row[0], row[1]
+        assert x - o in (0, 1)
+        assert row[-1] in (-1, 0, 1)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".npy"])
+def test_written_rows_load_as_a_dataset(suffix, tmp_path):
+    np = pytest.importorskip("numpy")
+    if suffix == ".csv":
+        pytest.importorskip("pandas")
+    from trainer import load_dataset
+    rows = selfplay.generate(30, 0.5, workers=1, seed=2)
+    path = str(tmp_path / ("data" + suffix))
+    selfplay.write_rows(rows, path)
+    X, y = load_dataset(path)
+    assert np.allclose(np.column_stack([X, y]), rows)
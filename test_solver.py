@@ -0,0 +1,38 @@
+# test_solver.py
+import pytest
+
+from board import BitBoard
+from conftest import full_window, random_positions
+from solver import SolvedTable, get_solved_table, position_index
+
+
+def test_table_matches_search():
+    table = get_solved_table()
+    for cells, player in random_positions(3, 3, 100, seed=4):
+        exact = full_window(BitBoard(cells), player, 9)
+        best = max(exact.values())
+        assert table.lookup(cells) == (best, sorted(m for m, s in exact.items() if s == best))
+
+
+def test_terminal_positions_are_not_in_the_table():
+    table = get_solved_table()
+    assert table.lookup(list("XXXOO----")) is None
+    assert table.lookup(list("XOXXOOOXX")) is None
+
+
+def test_index_is_the_board_code():
+    for cells, _ in random_positions(3, 3, 20, seed=8):
+        assert position_index(cells) == BitBoard(cells).code
+
+
+def test_save_and_load(tmp_path):
+    table = get_solved_table()
+    path = str(tmp_path / "solved.bin")
+    table.save(path)
+    loaded = SolvedTable.load(path)
+    assert list(loaded.values) == list(table.values)
+    assert list(loaded.best_masks) == list(table.best_masks)
+    with open(path, "r+b") as f:
+        f.write(b"JUNK")
+    with pytest.raises(ValueError):
+        SolvedTable.load(path)
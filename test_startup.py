@@ -0,0 +1,13 @@
+# test_startup.py
+import subprocess
+import sys
+
+
+def test_startup_path_skips_heavy_imports():
+    # What main.py imports and loads before the window opens, minus the GUI toolkit
+    code = ("import sys, engine, trainer\n"
+            "trainer.load_cached_model()\n"
+            "print(','.join(m for m in ('numpy', 'pandas', 'pygame', 'multiprocessing')"
+            " if m in sys.modules))\n")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
@@ -0,0 +1,88 @@
+# test_trainer.py
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+import trainer
+from trainer import fit_sgd, fit_sgd_fast, load_dataset, train
+
+
+@pytest.mark.parametrize("rows,epochs", [(301, 20), (64, 3), (1, 5)])
+def test_fast_sgd_matches_reference_loop(rows, epochs):
+    X, y = load_dataset()
+    X, y = X[:rows], y[:rows]
+    w, b = fit_sgd(X, y, epochs=epochs)
+    fast_w, fast_b = fit_sgd_fast(X, y, epochs=epochs)
+    assert fast_w == pytest.approx(w, rel=1e-9, abs=1e-12)
+    assert fast_b == pytest.approx(b, rel=1e-9, abs=1e-12)
+
+
+def test_default_training_reproduces_sgd():
+    X, y = load_dataset()
+    w, b = fit_sgd(X, y, epochs=10)
+    model = train(silent=True, epochs=10)
+    assert trainer.DEFAULT_METHOD == "sgd-fast"
+    assert model.weights == pytest.approx(w, rel=1e-9, abs=1e-12)
+    assert model.bias == pytest.approx(b, rel=1e-9, abs=1e-12)
+
+
+def test_cached_model_is_reused_until_the_data_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(trainer, "MODEL_CACHE_PATH", str(tmp_path / "model_cache.json"))
+    dataset = tmp_path / "data.csv"
+    dataset.write_bytes(open(trainer.DATASET_PATH, "rb").read())
+    model = trainer.load_or_train(dataset_path=str(dataset), epochs=5)
+
+    def no_training(**kwargs):
+        raise AssertionError("trained although the cache is valid")
+    monkeypatch.setattr(trainer, "train", no_training)
+    cached = trainer.load_or_train(dataset_path=str(dataset), epochs=5)
+    assert cached.weights == model.weights and cached.bias == model.bias
+
+    # Different data or hyperparameters make the cache stale
+    with open(dataset, "a") as f:
+        f.write(",".join(["1"] * 6 + ["0"]) + "\n")
+    with pytest.raises(AssertionError):
+        trainer.load_or_train(dataset_path=str(dataset), epochs=5)
+    # The cache was written for the bundled data's contents, with epochs=5
+    assert trainer.load_cached_model(epochs=5) is not None
+    assert trainer.load_cached_model(epochs=6) is None
+
+
+def test_csv_chunks_cover_the_dataset():
+    X, y = load_dataset()
+    chunks = list(trainer.iter_chunks(chunk_size=500))
+    assert [len(cy) for _, cy in chunks] == [500] * (len(y) // 500) + [len(y) % 500]
+    assert np.array_equal(np.vstack([cx for cx, _ in chunks]), X)
+    assert np.array_equal(np.concatenate([cy for _, cy in chunks]), y)
+
+
+def test_npy_copy_reads_like_the_csv(tmp_path):
+    X, y = load_dataset()
+    path = str(tmp_path / "data.npy")
+    assert trainer.to_npy(path, chunk_size=700) == len(y)
+    nX, ny = load_dataset(path)
+    assert np.allclose(nX, X) and np.allclose(ny, y)
+    chunks = list(trainer.iter_chunks(path, chunk_size=600))
+    assert max(len(cy) for _, cy in chunks) == 600
+    assert np.allclose(np.vstack([cx for cx, _ in chunks]), X)
+
+
+def test_streamed_least_squares_matches_in_memory():
+    X, y = load_dataset()
+    w, b = trainer.fit_lstsq(X, y)
+    sw, sb = trainer.fit_stream_lstsq(lambda: trainer.iter_chunks(chunk_size=300))
+    assert sw == pytest.approx(w, abs=1e-9)
+    assert sb == pytest.approx(b, abs=1e-9)
+    model = train(silent=True, method="stream-lstsq", chunk_size=300)
+    assert model.weights == pytest.approx(list(w), abs=1e-9)
+
+
+def test_streamed_minibatch_matches_in_memory_for_one_chunk():
+    X, y = load_dataset()
+    w, b = trainer.fit_minibatch(X, y, epochs=5)
+    sw, sb = trainer.fit_stream(lambda: trainer.iter_chunks(chunk_size=len(y)), epochs=5)
+    assert sw == pytest.approx(w) and sb == pytest.approx(b)
+    # Across chunks it still fits the data better than predicting the mean
+    sw, sb = trainer.fit_stream(lambda: trainer.iter_chunks(chunk_size=256), epochs=20)
+    assert np.abs(y - (X @ sw + sb)).mean() < np.abs(y - y.mean()).mean()
@@ -0,0 +1,52 @@
+# test_transposition.py
+import pytest
+
+from board import Board, make_board
+from conftest import full_window, random_model, random_positions
+from ml_model import MODELS
+from transposition import TranspositionTable, EXACT, LOWER
+
+
+@pytest.mark.parametrize("n,k,depth", [(3, 3, 9), (4, 3, 3), (5, 4, 2)])
+def test_search_with_table_matches_without(n, k, depth):
+    for cells, player in random_positions(n, k, 10, seed=n):
+        board = make_board(cells, n, k)
+        plain = full_window(board, player, depth)
+        tt = TranspositionTable()
+        assert full_window(board, player, depth, tt=tt) == plain
+        # A second pass answers from the table and still agrees
+        assert full_window(board, player, depth, tt=tt) == plain
+        assert board.cells == cells
+
+
+@pytest.mark.parametrize("kind", sorted(MODELS))
+def test_search_with_table_matches_without_for_every_model(kind):
+    pytest.importorskip("numpy")
+    model = random_model(kind, seed=2)
+    # One table for all positions, so symmetric positions meet in it
+    tt = TranspositionTable(symmetric=model.symmetric)
+    for cells, player in random_positions(3, 3, 40, seed=8):
+        board = make_board(cells, 3, 3)
+        plain = full_window(board, player, 3, model.evaluate)
+        assert full_window(board, player, 3, model.evaluate, tt) == pytest.approx(plain)
+
+
+def test_table_is_bounded():
+    tt = TranspositionTable(max_size=100)
+    full_window(Board(n=4, k=3), 'X', 3, tt=tt)
+    assert len(tt) == 100
+    assert tt.evictions > 0
+    assert 0.0 < tt.hit_rate() < 1.0
+
+
+def test_least_recently_used_entry_is_evicted():
+    tt = TranspositionTable(max_size=2)
+    tt.store("a", EXACT, 1)
+    tt.store("b", LOWER, 2)
+    assert tt.get("a") == (EXACT, 1)  # "b" is now the oldest
+    tt.store("c", EXACT, 3)
+    assert tt.get("b") is None
+    assert tt.get("a") == (EXACT, 1)
+    assert tt.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 1, "hit_rate": 0.6667}
+    tt.clear()
+    assert len(tt) == 0 and tt.hit_rate() == 0.0
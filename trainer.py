@@ -1,35 +1,130 @@
 # trainer.py
-import pandas as pd
+# pandas/numpy are imported inside the functions that need them, so loading
+# a cached model at startup does not pay for those imports.
 import os
-from ml_model import LinearModel
+import time
+import hashlib
+import json
+from ml_model import LinearModel, MODELS, batch_onehot
+from evalcache import EVAL_CACHE
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def train(silent=False):
-    dataset_path = os.path.join(SCRIPT_DIR, "tictactoe_dataset.csv")
+FEATURES = [
+    "f1_X_count",
+    "f2_O_count",
+    "f3_X_almost_win",
+    "f4_O_almost_win",
+    "f5_X_center",
+    "f6_X_corners"
+]
+
+METHODS = ("sgd-fast", "lstsq", "minibatch", "sgd", "stream", "stream-lstsq")
+
+# "sgd-fast" gives the same weights as the per-sample "sgd" loop, the model
+# ML mode has always played with. The least-squares and mini-batch methods
+# reach the least-squares optimum instead, whose weights differ (the center
+# and corner weights change sign), so the ML evaluation plays differently.
+DEFAULT_METHOD = "sgd-fast"
+
+# Rows per chunk for the streaming methods
+CHUNK_SIZE = 100_000
+
+DATASET_PATH = os.path.join(SCRIPT_DIR, "tictactoe_dataset.csv")
+MODEL_CACHE_PATH = os.path.join(SCRIPT_DIR, "model_cache.json")
+
+# Hyperparameters of the models trained on solved positions
+MLP_PARAMS = {"hidden": 32, "epochs": 1000, "lr": 0.01, "seed": 0}
+
+
+def load_dataset(dataset_path=None):
+    """Whole dataset as (X, y); .npy files are memory-mapped, not read in"""
+    if dataset_path is None:
+        dataset_path = DATASET_PATH
+    import numpy as np
+    if dataset_path.endswith(".npy"):
+        data = np.load(dataset_path, mmap_mode="r")
+        return data[:, :-1], data[:, -1]
+    import pandas as pd
     df = pd.read_csv(dataset_path)
 
     # Safety: remove hidden spaces
     df.columns = df.columns.str.strip()
 
-    X = df[
-        [
-            "f1_X_count",
-            "f2_O_count",
-            "f3_X_almost_win",
-            "f4_O_almost_win",
-            "f5_X_center",
-            "f6_X_corners"
-        ]
-    ].values
+    X = df[FEATURES].values.astype(np.float64)
+    y = df["label"].values.astype(np.float64)
+    return X, y
 
-    y = df["label"].values
 
-    model = LinearModel()
-    lr = 0.01  # Increased from 0.001
-    epochs = 200  # Increased from 50
+def iter_chunks(dataset_path=None, chunk_size=CHUNK_SIZE):
+    """Yield (X, y) blocks of at most chunk_size rows.
+
+    CSV files are read chunk by chunk; .npy files (see to_npy) are
+    memory-mapped and sliced, so memory use does not grow with the
+    dataset either way.
+    """
+    if dataset_path is None:
+        dataset_path = DATASET_PATH
+    import numpy as np
+    if dataset_path.endswith(".npy"):
+        data = np.load(dataset_path, mmap_mode="r")
+        for start in range(0, len(data), chunk_size):
+            block = np.asarray(data[start:start + chunk_size], dtype=np.float64)
+            yield block[:, :-1], block[:, -1]
+        return
+    import pandas as pd
+    for df in pd.read_csv(dataset_path, chunksize=chunk_size):
+        df.columns = df.columns.str.strip()
+        yield df[FEATURES].values.astype(np.float64), df["label"].values.astype(np.float64)
+
+
+def to_npy(out_path, dataset_path=None, chunk_size=CHUNK_SIZE):
+    """Convert a CSV dataset to a float32 .npy file (features then label)"""
+    import numpy as np
+    rows = sum(len(y) for _, y in iter_chunks(dataset_path, chunk_size))
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32,
+                                    shape=(rows, len(FEATURES) + 1))
+    start = 0
+    for X, y in iter_chunks(dataset_path, chunk_size):
+        out[start:start + len(y), :-1] = X
+        out[start:start + len(y), -1] = y
+        start += len(y)
+    out.flush()
+    return rows
+
+
+def fit_lstsq(X, y):
+    # Closed-form least squares with a bias column
+    import numpy as np
+    A = np.hstack([X, np.ones((len(X), 1))])
+    coef, *_ = np.linalg.lstsq(A, y, rcond=None)
+    return coef[:-1], coef[-1]
+
+
+def fit_minibatch(X, y, lr=0.01, epochs=200, batch_size=32, seed=0, silent=True):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    w = np.zeros(X.shape[1])
+    b = 0.0
+    for epoch in range(epochs):
+        order = rng.permutation(len(X))
+        for start in range(0, len(X), batch_size):
+            idx = order[start:start + batch_size]
+            Xb, yb = X[idx], y[idx]
+            error = yb - (Xb @ w + b)
+            w += lr * (Xb.T @ error) / len(idx)
+            b += lr * error.mean()
 
+        if not silent and (epoch + 1) % 50 == 0:
+            avg_error = np.abs(y - (X @ w + b)).mean()
+            print(f"Epoch {epoch + 1}/{epochs} - Avg Error: {avg_error:.4f}")
+    return w, b
+
+
+def fit_sgd(X, y, lr=0.01, epochs=200, silent=True):
+    # Original per-sample loop, kept as the reference implementation
+    model = LinearModel()
     for epoch in range(epochs):
         total_error = 0
         for features, label in zip(X, y):
@@ -41,11 +136,109 @@ def train(silent=False):
                 model.weights[i] += lr * error * features[i]
 
             model.bias += lr * error
-        
+
         # Print progress every 50 epochs
         if not silent and (epoch + 1) % 50 == 0:
             avg_error = total_error / len(X)
             print(f"Epoch {epoch + 1}/{epochs} - Avg Error: {avg_error:.4f}")
+    return model.weights, model.bias
+
+
+def fit_sgd_fast(X, y, lr=0.01, epochs=200):
+    """fit_sgd's result without the per-sample loop.
+
+    One SGD step on a sample z = (x, 1) is the affine map
+    w <- (I - lr z z^T) w + lr y z, and the samples are visited in the same
+    order every epoch, so an epoch is the composition of those maps and the
+    whole run is that epoch map raised to the number of epochs. The maps
+    are composed pairwise as batched 8x8 matrix products in homogeneous
+    coordinates. Equal to fit_sgd up to rounding; it holds one 8x8 matrix
+    per sample, so very large datasets are better trained by the stream methods.
+    """
+    import numpy as np
+    X = np.asarray(X, dtype=np.float64)
+    n, d = X.shape
+    Z = np.hstack([X, np.ones((n, 1))])
+    T = np.zeros((n, d + 2, d + 2))
+    T[:, :d + 1, :d + 1] = np.eye(d + 1) - lr * Z[:, :, None] * Z[:, None, :]
+    T[:, :d + 1, d + 1] = lr * np.asarray(y, dtype=np.float64)[:, None] * Z
+    T[:, d + 1, d + 1] = 1.0
+    # Sample i's map is applied after sample i-1's: compose neighbours, later on the left
+    while len(T) > 1:
+        odd = T[-1:] if len(T) % 2 else T[:0]
+        T = np.concatenate([T[1::2] @ T[0:len(T) - 1:2], odd])
+    v = np.linalg.matrix_power(T[0], epochs)[:, d + 1]
+    return v[:d], v[d]
+
+
+def fit_stream(chunks, lr=0.01, epochs=200, batch_size=32, seed=0, silent=True):
+    """Mini-batch gradient descent over chunks(), one chunk in memory at a time"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    w = None
+    b = 0.0
+    for epoch in range(epochs):
+        total_error, count = 0.0, 0
+        for X, y in chunks():
+            if w is None:
+                w = np.zeros(X.shape[1])
+            order = rng.permutation(len(X))
+            for start in range(0, len(X), batch_size):
+                idx = order[start:start + batch_size]
+                Xb, yb = X[idx], y[idx]
+                error = yb - (Xb @ w + b)
+                w += lr * (Xb.T @ error) / len(idx)
+                b += lr * error.mean()
+            if not silent:
+                total_error += np.abs(y - (X @ w + b)).sum()
+                count += len(y)
+
+        if not silent and (epoch + 1) % 50 == 0:
+            print(f"Epoch {epoch + 1}/{epochs} - Avg Error: {total_error / count:.4f}")
+    return w, b
+
+
+def fit_stream_lstsq(chunks):
+    """Exact least squares from normal equations summed chunk by chunk"""
+    import numpy as np
+    AtA = Aty = None
+    for X, y in chunks():
+        A = np.hstack([X, np.ones((len(X), 1))])
+        if AtA is None:
+            AtA, Aty = A.T @ A, A.T @ y
+        else:
+            AtA += A.T @ A
+            Aty += A.T @ y
+    coef, *_ = np.linalg.lstsq(AtA, Aty, rcond=None)
+    return coef[:-1], coef[-1]
+
+
+def train(silent=False, method=DEFAULT_METHOD, lr=0.01, epochs=200, dataset_path=None,
+          chunk_size=CHUNK_SIZE):
+    def chunks(): return iter_chunks(dataset_path, chunk_size)
+
+    if method == "stream":
+        w, b = fit_stream(chunks, lr=lr, epochs=epochs, silent=silent)
+    elif method == "stream-lstsq":
+        w, b = fit_stream_lstsq(chunks)
+    elif method not in METHODS:
+        raise ValueError(f"Unknown training method: {method}")
+    else:
+        X, y = load_dataset(dataset_path)
+        if method == "sgd-fast":
+            w, b = fit_sgd_fast(X, y, lr=lr, epochs=epochs)
+        elif method == "lstsq":
+            w, b = fit_lstsq(X, y)
+        elif method == "minibatch":
+            w, b = fit_minibatch(X, y, lr=lr, epochs=epochs, silent=silent)
+        else:
+            w, b = fit_sgd(X, y, lr=lr, epochs=epochs, silent=silent)
+
+    model = LinearModel()
+    model.weights = [float(v) for v in w]
+    model.bias = float(b)
+    # Cached values of earlier models are stale now
+    EVAL_CACHE.invalidate("ML")
 
     if not silent:
         print("Training finished successfully")
@@ -54,5 +247,191 @@ def train(silent=False):
 
     return model
 
+
+def position_dataset():
+    """Every non-terminal 3x3 position as (cell lists, solved label from X's view).
+
+    The CSV only holds the six aggregate features, so the one-hot models
+    learn from the solved table instead.
+    """
+    import numpy as np
+    from solver import get_solved_table, N_POSITIONS
+    table = get_solved_table()
+    rows, labels = [], []
+    for idx in range(N_POSITIONS):
+        if not table.best_masks[idx]:
+            continue
+        cells, code = [], idx
+        for _ in range(9):
+            cells.append("-XO"[code % 3])
+            code //= 3
+        score = table.values[idx]
+        value = 1 if score >= 1000 else -1 if score <= -1000 else 0
+        mover = 'X' if cells.count('X') == cells.count('O') else 'O'
+        rows.append(cells)
+        labels.append(value if mover == 'X' else -value)
+    return rows, np.asarray(labels, dtype=np.float64)
+
+
+def fit_mlp(X, y, hidden=16, epochs=400, lr=0.01, seed=0, silent=True):
+    """Full-batch Adam on a one-hidden-layer tanh network (squared error)"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    params = [rng.normal(0, 1 / np.sqrt(X.shape[1]), (X.shape[1], hidden)),
+              np.zeros(hidden), rng.normal(0, 1 / np.sqrt(hidden), hidden), np.zeros(1)]
+    m = [np.zeros_like(p) for p in params]
+    v = [np.zeros_like(p) for p in params]
+    for epoch in range(epochs):
+        W1, b1, w2, b2 = params
+        H = np.tanh(X @ W1 + b1)
+        error = H @ w2 + b2 - y
+        dH = np.outer(error, w2) * (1 - H ** 2) / len(X)
+        grads = [X.T @ dH, dH.sum(axis=0), H.T @ error / len(X), np.array([error.mean()])]
+        for i, g in enumerate(grads):
+            m[i] = 0.9 * m[i] + 0.1 * g
+            v[i] = 0.999 * v[i] + 0.001 * g ** 2
+            mhat = m[i] / (1 - 0.9 ** (epoch + 1))
+            vhat = v[i] / (1 - 0.999 ** (epoch + 1))
+            params[i] -= lr * mhat / (np.sqrt(vhat) + 1e-8)
+        if not silent and (epoch + 1) % 100 == 0:
+            print(f"Epoch {epoch + 1}/{epochs} - Avg Error: {np.abs(error).mean():.4f}")
+    return params
+
+
+def train_model(kind="linear", silent=True, **kwargs):
+    """Train one model kind; 'linear' is train() on the CSV, the rest use solved positions"""
+    if kind == "linear":
+        return train(silent=silent, **kwargs)
+    if kind not in MODELS:
+        raise ValueError(f"Unknown model kind: {kind}")
+    rows, y = position_dataset()
+    X = batch_onehot(rows)
+    if kind == "onehot":
+        w, b = fit_lstsq(X, y)
+        model = MODELS[kind]()
+        model.weights = [float(v) for v in w]
+        model.bias = float(b)
+    else:
+        W1, b1, w2, b2 = fit_mlp(X, y, silent=silent, **MLP_PARAMS)
+        model = MODELS[kind](W1.tolist(), b1.tolist(), w2.tolist(), float(b2[0]))
+    EVAL_CACHE.invalidate("ML")
+    return model
+
+
+def model_cache_path(kind="linear"):
+    return MODEL_CACHE_PATH if kind == "linear" else os.path.join(
+        SCRIPT_DIR, f"model_cache_{kind}.json")
+
+
+def cache_key(method=DEFAULT_METHOD, lr=0.01, epochs=200, dataset_path=None):
+    """Hash of the dataset contents and the training hyperparameters"""
+    if dataset_path is None:
+        dataset_path = DATASET_PATH
+    h = hashlib.sha256()
+    with open(dataset_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    params = {"method": method, "lr": lr, "epochs": epochs, "features": FEATURES}
+    h.update(json.dumps(params, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def model_key(kind):
+    """Cache key for the models trained on solved positions"""
+    from solver import MAGIC, SEARCH_DEPTH
+    params = {"kind": kind, "mlp": MLP_PARAMS, "table": MAGIC.decode(), "depth": SEARCH_DEPTH}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def load_cached_model(method=DEFAULT_METHOD, lr=0.01, epochs=200, kind="linear"):
+    """Return the cached model, or None if it is missing or stale"""
+    key = cache_key(method, lr, epochs) if kind == "linear" else model_key(kind)
+    return MODELS[kind].load(model_cache_path(kind), key)
+
+
+def load_or_train(silent=True, method=DEFAULT_METHOD, lr=0.01, epochs=200, dataset_path=None,
+                  kind="linear"):
+    """Return the cached model if it matches the data, otherwise train and cache"""
+    if kind == "linear":
+        key = cache_key(method, lr, epochs, dataset_path)
+    else:
+        key = model_key(kind)
+    path = model_cache_path(kind)
+    model = MODELS[kind].load(path, key)
+    if model is not None:
+        return model
+    if kind == "linear":
+        model = train(silent=silent, method=method, lr=lr, epochs=epochs,
+                      dataset_path=dataset_path)
+    else:
+        model = train_model(kind, silent=silent)
+    try:
+        model.save(path, key)
+    except OSError:
+        pass
+    return model
+
+
+def compare(dataset_path=None):
+    """Time every training method on a dataset (the bundled CSV by default)"""
+    import numpy as np
+    X, y = load_dataset(dataset_path)
+    print(f"{len(X)} samples, {X.shape[1]} features\n")
+    for method in METHODS:
+        start = time.perf_counter()
+        model = train(silent=True, method=method, dataset_path=dataset_path)
+        elapsed = time.perf_counter() - start
+        pred = X @ np.array(model.weights) + model.bias
+        mae = np.abs(y - pred).mean()
+        print(f"{method:<10} {elapsed * 1000:9.1f} ms   avg error {mae:.4f}")
+        print(f"{'':<10} weights {[round(v, 4) for v in model.weights]} bias {model.bias:.4f}")
+
+
+def compare_models(repeats=2000):
+    """Accuracy on the solved positions and per-call latency of every model kind"""
+    import numpy as np
+    from board import BitBoard
+    rows, y = position_dataset()
+    boards = [BitBoard(r) for r in rows[:repeats]]
+    print(f"{len(rows)} solved positions\n")
+    print(f"{'model':<8}{'train ms':>10}{'avg error':>11}{'sign acc':>10}"
+          f"{'us/eval':>10}{'us/row batched':>16}")
+    for kind in MODELS:
+        start = time.perf_counter()
+        model = train_model(kind)
+        train_ms = (time.perf_counter() - start) * 1000
+        pred = np.asarray(model.evaluate_batch(rows, 'X', boards[0]))
+        error = np.abs(pred - y).mean()
+        accuracy = (np.sign(np.round(pred)) == y).mean()
+
+        start = time.perf_counter()
+        for b in boards:
+            model.evaluate(b, 'X')
+        per_eval = (time.perf_counter() - start) / len(boards) * 1e6
+        start = time.perf_counter()
+        model.evaluate_batch(rows, 'X', boards[0])
+        per_row = (time.perf_counter() - start) / len(rows) * 1e6
+        print(f"{kind:<8}{train_ms:>10.1f}{error:>11.4f}{accuracy:>10.1%}"
+              f"{per_eval:>10.2f}{per_row:>16.3f}")
+
+
 if __name__ == "__main__":
-    train()
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the ML evaluation model")
+    parser.add_argument("--compare", action="store_true", help="time every training method")
+    parser.add_argument("--models", action="store_true",
+                        help="compare accuracy and per-call latency of every model kind")
+    parser.add_argument("--method", choices=METHODS, default=DEFAULT_METHOD)
+    parser.add_argument("--dataset", help="CSV or .npy dataset (default: bundled CSV)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--to-npy", metavar="PATH",
+                        help="convert the dataset to a memory-mappable .npy file")
+    args = parser.parse_args()
+    if args.to_npy:
+        print(f"Wrote {to_npy(args.to_npy, args.dataset, args.chunk_size)} rows to {args.to_npy}")
+    elif args.models:
+        compare_models()
+    elif args.compare:
+        compare(args.dataset)
+    else:
+        train(method=args.method, dataset_path=args.dataset, chunk_size=args.chunk_size)
@@ -0,0 +1,63 @@
+# transposition.py
+from collections import OrderedDict
+
+# Entry flags: how the stored value relates to the true minimax value
+EXACT = 0
+LOWER = 1  # value is a lower bound (search failed high)
+UPPER = 2  # value is an upper bound (search failed low)
+
+
+class TranspositionTable:
+    """Bounded search cache keyed on symmetry-canonical positions.
+
+    Least recently used entries are evicted once max_size is reached.
+    A table must only be shared between searches that use the same
+    evaluation function. With symmetric=False entries are keyed on the
+    exact position (board.raw_key()) instead, for evaluation functions
+    that can score symmetric positions differently.
+    """
+
+    def __init__(self, max_size=200_000, symmetric=True):
+        self.max_size = max_size
+        self.symmetric = symmetric
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, flag, value):
+        entries = self.entries
+        entries[key] = (flag, value)
+        entries.move_to_end(key)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate(), 4),
+        }